@@ -11,6 +11,7 @@ Clean, maintainable, ~2000 lines.
 
 from flask import Flask, render_template, request, jsonify, Response
 import pandas as pd
+import orjson
 import chromadb
 from chromadb.utils import embedding_functions
 from openai import OpenAI
@@ -18,31 +19,38 @@ from pathlib import Path
 import re
 import json
 from typing import List, Tuple, Dict, Any, Optional
-from collections import Counter
+from collections import Counter, OrderedDict
+from functools import lru_cache
 from datetime import datetime
 import os
 import time
 from dotenv import load_dotenv
 import hashlib
 import io
+import threading
+
+from search import build_search_text, parse_boolean_query
 
 # ============================================================================
 # UNICODE SANITIZATION (Windows compatibility)
 # ============================================================================
 
+UNICODE_REPLACEMENTS = {
+    '\u2011': '-', '\u2013': '-', '\u2014': '-',
+    '\u2018': "'", '\u2019': "'",
+    '\u201c': '"', '\u201d': '"',
+    '\u2026': '...', '\u00a0': ' ',
+}
+# Same replacements as a str.translate table (one pass per string instead of one replace per character)
+UNICODE_TRANSLATION = str.maketrans(UNICODE_REPLACEMENTS)
+UNICODE_REPLACEMENTS_RE = re.compile('[' + ''.join(re.escape(char) for char in UNICODE_REPLACEMENTS) + ']')
+
 def sanitize_unicode_for_windows(text):
     """Replace Unicode characters incompatible with Windows cp1252 codec."""
     if not text:
         return text
 
-    replacements = {
-        '\u2011': '-', '\u2013': '-', '\u2014': '-',
-        '\u2018': "'", '\u2019': "'",
-        '\u201c': '"', '\u201d': '"',
-        '\u2026': '...', '\u00a0': ' ',
-    }
-
-    for unicode_char, replacement in replacements.items():
+    for unicode_char, replacement in UNICODE_REPLACEMENTS.items():
         text = text.replace(unicode_char, replacement)
 
     return text
@@ -60,6 +68,31 @@ def sanitize_data_structure(data):
     else:
         return data
 
+def dataframe_to_records(df: pd.DataFrame) -> list:
+    """DataFrame -> sanitized records (NaN/NaT -> None), values otherwise as to_dict('records') returns them.
+
+    Same result as sanitize_data_structure(df.to_dict('records')), but NaN is
+    replaced frame-wide and only the string cells that contain a replaceable
+    character are rewritten.
+    """
+    records_df = df.astype(object).where(df.notna(), None)
+    for col in df.columns[df.dtypes == object]:
+        values = records_df[col]
+        if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'mixed', 'mixed-integer'):
+            continue  # no strings in this column
+        needs_sanitizing = values.str.contains(UNICODE_REPLACEMENTS_RE, na=False)
+        if needs_sanitizing.any():
+            records_df.loc[needs_sanitizing, col] = values[needs_sanitizing].str.translate(UNICODE_TRANSLATION)
+    return records_df.to_dict('records')
+
+def dataframe_to_markdown(df: pd.DataFrame) -> str:
+    """Compact pipe table for prompts (no column padding, unlike tabulate-backed to_markdown)."""
+    columns = [str(col) for col in df.columns]
+    lines = ['| ' + ' | '.join(columns) + ' |', '|' + '|'.join(['---'] * len(columns)) + '|']
+    for row in df.itertuples(index=False, name=None):
+        lines.append('| ' + ' | '.join(str(value).replace('|', '\\|').replace('\n', ' ') for value in row) + ' |')
+    return '\n'.join(lines)
+
 # ============================================================================
 # SSE STREAMING UTILITIES
 # ============================================================================
@@ -82,6 +115,10 @@ def stream_with_heartbeat(inner_gen, interval=15):
     # Final heartbeat
     yield ": done\n\n"
 
+def sse_event(payload) -> str:
+    """Encode payload as an SSE data frame with orjson (hot path for token deltas); NaN is sent as null."""
+    return "data: " + orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY).decode("utf-8") + "\n\n"
+
 SSE_HEADERS = {
     "Cache-Control": "no-cache, no-transform",
     "Connection": "keep-alive",
@@ -104,9 +141,14 @@ app.secret_key = os.environ.get("FLASK_SECRET_KEY", "a_strong_fallback_secret_ke
 # ============================================================================
 
 CSV_FILE = Path(__file__).parent / "ESMO_2025_FINAL_20250929.csv"
+DRUG_DB_FILE = Path(__file__).parent / "Drug_Company_names.csv"
 CHROMA_DB_PATH = "./chroma_conference_db"
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 
+# Columns returned (and keyword-searched) by the Data Explorer endpoints
+EXPLORER_COLUMNS = ['Title', 'Speakers', 'Affiliation', 'Speaker Location', 'Identifier', 'Room',
+                    'Session', 'Date', 'Time', 'Theme']
+
 # OpenAI client with controlled connection pooling for Railway deployment
 if OPENAI_API_KEY:
     import httpx
@@ -680,6 +722,52 @@ REQUIREMENTS:
     }
 }
 
+# Map EMD drug selection to specific competitors, indication keywords and MOA classes (competitor playbook)
+COMPETITOR_FOCUS = {
+    "Avelumab Focus": {
+        "indication": "Metastatic Bladder Cancer (1L maintenance)",
+        "key_competitors": ["enfortumab vedotin (EV)", "EV+pembrolizumab (EV+P)", "pembrolizumab", "nivolumab", "durvalumab", "atezolizumab", "sacituzumab govitecan", "erdafitinib"],
+        "therapeutic_area": "Bladder/Urothelial Cancer",
+        "indication_keywords": ["bladder", "urothelial", "uroepithelial"],
+        "focus_moa_classes": ["ICI", "ADC", "Targeted Therapy", "Bispecific Antibody"]
+    },
+    "Tepotinib Focus": {
+        "indication": "NSCLC with MET exon 14 skipping mutations",
+        "key_competitors": ["capmatinib", "crizotinib", "osimertinib", "alectinib", "selpercatinib", "pralsetinib", "pembrolizumab"],
+        "therapeutic_area": "Non-Small Cell Lung Cancer (NSCLC) - MET alterations",
+        "indication_keywords": ["lung", "NSCLC", "MET"],
+        "focus_moa_classes": ["TKI", "ADC", "ICI", "Targeted Therapy"]
+    },
+    "Cetuximab CRC": {
+        "indication": "Metastatic Colorectal Cancer (EGFR+, RAS wild-type)",
+        "key_competitors": ["panitumumab", "bevacizumab", "pembrolizumab", "nivolumab", "regorafenib", "trifluridine/tipiracil", "fruquintinib", "encorafenib+cetuximab"],
+        "therapeutic_area": "Metastatic Colorectal Cancer",
+        "indication_keywords": ["colorectal", "CRC", "colon", "rectal"],
+        "focus_moa_classes": ["Targeted Therapy", "ICI", "ADC", "Bispecific Antibody"]
+    },
+    "Cetuximab H&N": {
+        "indication": "Locally Advanced or Metastatic Head & Neck Cancer (EGFR+)",
+        "key_competitors": ["pembrolizumab", "nivolumab", "durvalumab", "panitumumab", "toripalimab"],
+        "therapeutic_area": "Head & Neck Squamous Cell Carcinoma",
+        "indication_keywords": ["head and neck", "head & neck", "H&N", "HNSCC", "SCCHN", "oral", "pharyngeal", "laryngeal"],
+        "focus_moa_classes": ["Targeted Therapy", "ICI", "ADC", "Bispecific Antibody"]
+    }
+}
+
+def build_competitor_focus_guidance(selected_drug: str, focus: dict) -> str:
+    """Prompt block steering the competitor playbook toward one EMD asset's competitors."""
+    competitor_list = "', '".join(focus["key_competitors"])
+    return "".join([
+        "\n\n**COMPETITIVE ANALYSIS FOCUS**:\n",
+        f"- **Primary EMD Asset**: {selected_drug.replace(' Focus', '')} in {focus['indication']}\n",
+        f"- **Therapeutic Area**: {focus['therapeutic_area']}\n",
+        f"- **Key Competitors to Analyze**: '{competitor_list}'\n",
+        "- **Analysis Scope**: Prioritize these competitors in your analysis. Search the competitor abstracts table for mentions of these drugs and provide detailed competitive positioning insights."
+    ])
+
+# Guidance depends only on the static focus config - render once at import
+COMPETITOR_FOCUS_GUIDANCE = {drug: build_competitor_focus_guidance(drug, focus) for drug, focus in COMPETITOR_FOCUS.items()}
+
 # ============================================================================
 # DATA LOADING & PREPROCESSING
 # ============================================================================
@@ -692,6 +780,15 @@ def file_md5(filepath):
             hash_md5.update(chunk)
     return hash_md5.hexdigest()
 
+@lru_cache(maxsize=4)
+def read_drug_database(path: str, mtime_ns: int) -> pd.DataFrame:
+    """Parse Drug_Company_names.csv; cached per (path, mtime) so edits to the file are picked up."""
+    return pd.read_csv(path, encoding='utf-8-sig').fillna('')
+
+def load_drug_database() -> pd.DataFrame:
+    """Return the drug/company/MOA table (shared cached frame - treat as read-only)."""
+    return read_drug_database(str(DRUG_DB_FILE), DRUG_DB_FILE.stat().st_mtime_ns)
+
 def load_and_process_data():
     """Load ESMO CSV and prepare for analysis."""
     global df_global, csv_hash_global, chroma_client, collection
@@ -782,20 +879,16 @@ def initialize_chromadb(df):
                 metadata={"description": "ESMO 2025 Conference Abstracts"}
             )
 
-            # Add documents to collection
-            documents = []
-            metadatas = []
-            ids = []
-
-            for idx, row in df.iterrows():
-                doc_text = f"{row['Title']} {row['Speakers']} {row['Affiliation']} {row['Theme']}"
-                documents.append(doc_text)
-                metadatas.append({
-                    "identifier": str(row['Identifier']),
-                    "speaker": str(row['Speakers']),
-                    "affiliation": str(row['Affiliation'])
-                })
-                ids.append(f"doc_{idx}")
+            # Add documents to collection (built column-wise instead of boxing every row)
+            titles = df['Title'].astype(str)
+            speakers = df['Speakers'].astype(str)
+            affiliations = df['Affiliation'].astype(str)
+            documents = (titles + ' ' + speakers + ' ' + affiliations + ' ' + df['Theme'].astype(str)).tolist()
+            metadatas = [
+                {"identifier": identifier, "speaker": speaker, "affiliation": affiliation}
+                for identifier, speaker, affiliation in zip(df['Identifier'].astype(str), speakers, affiliations)
+            ]
+            ids = [f"doc_{idx}" for idx in df.index]
 
             # Add in batches
             batch_size = 500
@@ -821,37 +914,59 @@ def initialize_chromadb(df):
 # FILTER LOGIC (Therapeutic Area Filters)
 # ============================================================================
 
+def compile_terms(keywords=(), acronyms=(), case: bool = False) -> re.Pattern:
+    """Compile keywords (substring) and acronyms (word boundary) into one alternation regex."""
+    parts = [re.escape(k) for k in keywords] + [r'\b' + re.escape(a) + r'\b' for a in acronyms]
+    return re.compile('|'.join(parts), 0 if case else re.IGNORECASE)
+
+@lru_cache(maxsize=64)
+def compile_regex_terms(patterns: Tuple[str, ...]) -> re.Pattern:
+    """Compile regex keywords into one case-insensitive alternation (cached per keyword tuple)."""
+    return re.compile('|'.join(f'(?:{p})' for p in patterns), re.IGNORECASE)
+
+def title_or_theme_contains(df: pd.DataFrame, pattern: re.Pattern) -> pd.Series:
+    """Single regex scan of Title and Theme."""
+    return df["Title"].str.contains(pattern, na=False) | df["Theme"].str.contains(pattern, na=False)
+
+# Precompiled keyword patterns - one scan per column instead of one per keyword
+BLADDER_KEYWORDS_RE = compile_terms(["bladder", "urothelial", "uroepithelial", "transitional cell", "genitourinary"])
+BLADDER_ACRONYM_RE = compile_terms(acronyms=["GU"], case=True)  # Case-sensitive to avoid "giant"
+BLADDER_EXCLUSIONS_RE = compile_terms(["prostate"])
+
+RENAL_TERMS_RE = compile_terms(["renal", "renal cell"], acronyms=["RCC"])
+RENAL_BLADDER_RE = compile_terms(["bladder", "urothelial", "uroepithelial"])
+
+LUNG_KEYWORDS_RE = compile_terms(["lung", "non-small cell lung cancer", "non-small-cell lung cancer"])
+# Case-sensitive acronyms with word boundaries to prevent false matches
+LUNG_ACRONYMS_RE = compile_terms(acronyms=["NSCLC", "MET", "ALK", "EGFR", "KRAS", "BRAF", "RET", "ROS1", "NTRK"], case=True)
+
+CRC_TERMS_RE = compile_terms(["colorectal", "colon", "rectal", "bowel"], acronyms=["CRC"])
+CRC_EXCLUSIONS_RE = compile_terms(
+    ["gastric", "stomach", "esophageal", "esophagus", "pancreatic", "pancreas",
+     "hepatocellular", "liver cancer", "biliary", "cholangiocarcinoma"],
+    acronyms=["HCC", "GEJ"]
+)
+
+HEAD_NECK_TERMS_RE = compile_terms(
+    ["head and neck", "head & neck", "squamous cell carcinoma of the head", "oral", "pharyngeal", "laryngeal"],
+    acronyms=["H&N", "HNSCC", "SCCHN"]
+)
+
+TGCT_TERMS_RE = compile_terms(["tenosynovial giant cell tumor", "pigmented villonodular synovitis"], acronyms=["TGCT", "PVNS"])
+
+# Strict word boundaries to avoid false matches: ATR (not "atrocious"), ATM (not "atmosphere")
+DDRI_ACRONYMS_RE = compile_terms(acronyms=["ATR", "ATRi", "ATM", "ATMi", "PARP", "PARPi"], case=True)
+DDRI_PHRASES_RE = compile_terms(["DNA damage response"])
+
 def apply_bladder_cancer_filter(df: pd.DataFrame) -> pd.Series:
     """Apply bladder cancer filter with prostate exclusion."""
-    keywords = ["bladder", "urothelial", "uroepithelial", "transitional cell", "genitourinary"]
-    acronym = "GU"  # Case-sensitive, word boundary
-    exclusions = ["prostate"]
-
-    mask = pd.Series([False] * len(df), index=df.index)
-
-    # Regular keywords (case-insensitive)
-    for keyword in keywords:
-        title_mask = df["Title"].str.contains(keyword, case=False, na=False, regex=False)
-        theme_mask = df["Theme"].str.contains(keyword, case=False, na=False, regex=False)
-        mask = mask | title_mask | theme_mask
-
-    # Acronym with word boundary (case-sensitive to avoid "giant")
-    pattern = r'\b' + re.escape(acronym) + r'\b'
-    title_mask = df["Title"].str.contains(pattern, case=True, na=False, regex=True)
-    theme_mask = df["Theme"].str.contains(pattern, case=True, na=False, regex=True)
-    mask = mask | title_mask | theme_mask
-
-    # Build theme-has-prostate mask
-    theme_has_prostate = pd.Series([False] * len(df), index=df.index)
-    for exclusion in exclusions:
-        theme_has_prostate = theme_has_prostate | df["Theme"].str.contains(exclusion, case=False, na=False, regex=False)
-
-    # Build title-has-bladder mask for smart exclusion
-    title_has_bladder = pd.Series([False] * len(df), index=df.index)
-    for keyword in keywords:
-        title_has_bladder = title_has_bladder | df["Title"].str.contains(keyword, case=False, na=False, regex=False)
-    pattern_gu = r'\b' + re.escape(acronym) + r'\b'
-    title_has_bladder = title_has_bladder | df["Title"].str.contains(pattern_gu, case=True, na=False, regex=True)
+    title_has_bladder = (df["Title"].str.contains(BLADDER_KEYWORDS_RE, na=False) |
+                         df["Title"].str.contains(BLADDER_ACRONYM_RE, na=False))
+    theme_has_bladder = (df["Theme"].str.contains(BLADDER_KEYWORDS_RE, na=False) |
+                         df["Theme"].str.contains(BLADDER_ACRONYM_RE, na=False))
+    mask = title_has_bladder | theme_has_bladder
+
+    theme_has_prostate = df["Theme"].str.contains(BLADDER_EXCLUSIONS_RE, na=False)
 
     # Logic: (title match) OR (theme match AND no prostate in theme) OR (theme has prostate BUT title has bladder)
     mask = title_has_bladder | (mask & ~theme_has_prostate) | (theme_has_prostate & title_has_bladder)
@@ -860,33 +975,9 @@ def apply_bladder_cancer_filter(df: pd.DataFrame) -> pd.Series:
 
 def apply_renal_cancer_filter(df: pd.DataFrame) -> pd.Series:
     """Apply renal cancer filter."""
-    keywords = ["renal", "renal cell"]
-    acronyms = ["RCC"]
-    bladder_keywords = ["bladder", "urothelial", "uroepithelial"]
-
-    mask = pd.Series([False] * len(df), index=df.index)
-    title_has_renal = pd.Series([False] * len(df), index=df.index)
-
-    # Build title and theme masks
-    for keyword in keywords:
-        title_has_renal = title_has_renal | df["Title"].str.contains(keyword, case=False, na=False, regex=False)
-
-    for acronym in acronyms:
-        pattern = r'\b' + re.escape(acronym) + r'\b'
-        title_has_renal = title_has_renal | df["Title"].str.contains(pattern, case=False, na=False, regex=True)
-
-    theme_has_renal = pd.Series([False] * len(df), index=df.index)
-    for keyword in keywords:
-        theme_has_renal = theme_has_renal | df["Theme"].str.contains(keyword, case=False, na=False, regex=False)
-
-    for acronym in acronyms:
-        pattern = r'\b' + re.escape(acronym) + r'\b'
-        theme_has_renal = theme_has_renal | df["Theme"].str.contains(pattern, case=False, na=False, regex=True)
-
-    # Check if theme contains bladder keywords
-    theme_has_bladder = pd.Series([False] * len(df), index=df.index)
-    for bladder_kw in bladder_keywords:
-        theme_has_bladder = theme_has_bladder | df["Theme"].str.contains(bladder_kw, case=False, na=False, regex=False)
+    title_has_renal = df["Title"].str.contains(RENAL_TERMS_RE, na=False)
+    theme_has_renal = df["Theme"].str.contains(RENAL_TERMS_RE, na=False)
+    theme_has_bladder = df["Theme"].str.contains(RENAL_BLADDER_RE, na=False)
 
     # Logic: title match OR (theme match AND no bladder in theme)
     mask = title_has_renal | (theme_has_renal & ~theme_has_bladder)
@@ -894,159 +985,62 @@ def apply_renal_cancer_filter(df: pd.DataFrame) -> pd.Series:
 
 def apply_lung_cancer_filter(df: pd.DataFrame) -> pd.Series:
     """Apply lung cancer filter."""
-    keywords = ["lung", "non-small cell lung cancer", "non-small-cell lung cancer"]
-    acronyms = ["NSCLC", "MET", "ALK", "EGFR", "KRAS", "BRAF", "RET", "ROS1", "NTRK"]  # All with word boundaries
-
-    mask = pd.Series([False] * len(df), index=df.index)
-
-    for keyword in keywords:
-        title_mask = df["Title"].str.contains(keyword, case=False, na=False, regex=False)
-        theme_mask = df["Theme"].str.contains(keyword, case=False, na=False, regex=False)
-        mask = mask | title_mask | theme_mask
-
-    for acronym in acronyms:
-        # Use word boundaries and case-sensitivity for acronyms to prevent false matches
-        pattern = r'\b' + re.escape(acronym) + r'\b'
-        title_mask = df["Title"].str.contains(pattern, case=True, na=False, regex=True)
-        theme_mask = df["Theme"].str.contains(pattern, case=True, na=False, regex=True)
-        mask = mask | title_mask | theme_mask
-
-    return mask
+    return title_or_theme_contains(df, LUNG_KEYWORDS_RE) | title_or_theme_contains(df, LUNG_ACRONYMS_RE)
 
 def apply_colorectal_cancer_filter(df: pd.DataFrame) -> pd.Series:
     """Apply colorectal cancer filter."""
-    keywords = ["colorectal", "colon", "rectal", "bowel"]
-    acronyms = ["CRC"]
-    exclusions = ["gastric", "stomach", "esophageal", "esophagus", "pancreatic", "pancreas",
-                  "hepatocellular", "liver cancer", "biliary", "cholangiocarcinoma"]
-    exclusion_acronyms = ["HCC", "GEJ"]
-
-    mask = pd.Series([False] * len(df), index=df.index)
-
-    for keyword in keywords:
-        title_mask = df["Title"].str.contains(keyword, case=False, na=False, regex=False)
-        theme_mask = df["Theme"].str.contains(keyword, case=False, na=False, regex=False)
-        mask = mask | title_mask | theme_mask
-
-    for acronym in acronyms:
-        pattern = r'\b' + re.escape(acronym) + r'\b'
-        title_mask = df["Title"].str.contains(pattern, case=False, na=False, regex=True)
-        theme_mask = df["Theme"].str.contains(pattern, case=False, na=False, regex=True)
-        mask = mask | title_mask | theme_mask
-
-    # Build title-has-CRC mask for smart exclusion
-    title_has_crc = pd.Series([False] * len(df), index=df.index)
-    for keyword in keywords:
-        title_has_crc = title_has_crc | df["Title"].str.contains(keyword, case=False, na=False, regex=False)
-    for acronym in acronyms:
-        pattern = r'\b' + re.escape(acronym) + r'\b'
-        title_has_crc = title_has_crc | df["Title"].str.contains(pattern, case=False, na=False, regex=True)
+    title_has_crc = df["Title"].str.contains(CRC_TERMS_RE, na=False)
+    mask = title_has_crc | df["Theme"].str.contains(CRC_TERMS_RE, na=False)
 
     # Exclude other GI cancers unless title has CRC terms
-    for exclusion in exclusions:
-        exclusion_mask = df["Title"].str.contains(exclusion, case=False, na=False, regex=False) | \
-                        df["Theme"].str.contains(exclusion, case=False, na=False, regex=False)
-        mask = mask & ~(exclusion_mask & ~title_has_crc)
-
-    for exclusion_acronym in exclusion_acronyms:
-        pattern = r'\b' + re.escape(exclusion_acronym) + r'\b'
-        exclusion_mask = df["Title"].str.contains(pattern, case=False, na=False, regex=True) | \
-                        df["Theme"].str.contains(pattern, case=False, na=False, regex=True)
-        mask = mask & ~(exclusion_mask & ~title_has_crc)
+    exclusion_mask = title_or_theme_contains(df, CRC_EXCLUSIONS_RE)
+    mask = mask & ~(exclusion_mask & ~title_has_crc)
 
     return mask
 
 def apply_head_neck_cancer_filter(df: pd.DataFrame) -> pd.Series:
     """Apply head and neck cancer filter."""
-    keywords = ["head and neck", "head & neck", "squamous cell carcinoma of the head", "oral", "pharyngeal", "laryngeal"]
-    acronyms = ["H&N", "HNSCC", "SCCHN"]
-
-    mask = pd.Series([False] * len(df), index=df.index)
-
-    for keyword in keywords:
-        title_mask = df["Title"].str.contains(keyword, case=False, na=False, regex=False)
-        theme_mask = df["Theme"].str.contains(keyword, case=False, na=False, regex=False)
-        mask = mask | title_mask | theme_mask
-
-    for acronym in acronyms:
-        pattern = r'\b' + re.escape(acronym) + r'\b'
-        title_mask = df["Title"].str.contains(pattern, case=False, na=False, regex=True)
-        theme_mask = df["Theme"].str.contains(pattern, case=False, na=False, regex=True)
-        mask = mask | title_mask | theme_mask
-
-    return mask
+    return title_or_theme_contains(df, HEAD_NECK_TERMS_RE)
 
 def apply_tgct_filter(df: pd.DataFrame) -> pd.Series:
     """Apply TGCT filter."""
-    keywords = ["tenosynovial giant cell tumor", "pigmented villonodular synovitis"]
-    acronyms = ["TGCT", "PVNS"]
-
-    mask = pd.Series([False] * len(df), index=df.index)
-
-    for keyword in keywords:
-        title_mask = df["Title"].str.contains(keyword, case=False, na=False, regex=False)
-        theme_mask = df["Theme"].str.contains(keyword, case=False, na=False, regex=False)
-        mask = mask | title_mask | theme_mask
-
-    for acronym in acronyms:
-        pattern = r'\b' + re.escape(acronym) + r'\b'
-        title_mask = df["Title"].str.contains(pattern, case=False, na=False, regex=True)
-        theme_mask = df["Theme"].str.contains(pattern, case=False, na=False, regex=True)
-        mask = mask | title_mask | theme_mask
-
-    return mask
+    return title_or_theme_contains(df, TGCT_TERMS_RE)
 
 def apply_ddri_filter(df: pd.DataFrame) -> pd.Series:
     """Apply DNA Damage Response Inhibitor filter with strict word boundaries."""
-    # Strict patterns with word boundaries to avoid false matches
-    patterns = [
-        r'\bATR\b',      # ATR (not "atrocious")
-        r'\bATRi\b',     # ATR inhibitor
-        r'\bATM\b',      # ATM (not "atmosphere")
-        r'\bATMi\b',     # ATM inhibitor
-        r'\bPARP\b',     # PARP
-        r'\bPARPi\b'     # PARP inhibitor
-    ]
-
-    # Long-form phrase (must match full phrase)
-    phrases = ["DNA Damage Response", "DNA damage response"]
-
-    mask = pd.Series([False] * len(df), index=df.index)
-
-    # Search patterns with word boundaries (case-sensitive for acronyms)
-    for pattern in patterns:
-        title_mask = df["Title"].str.contains(pattern, case=True, na=False, regex=True)
-        theme_mask = df["Theme"].str.contains(pattern, case=True, na=False, regex=True)
-        mask = mask | title_mask | theme_mask
-
-    # Search phrases (case-insensitive)
-    for phrase in phrases:
-        title_mask = df["Title"].str.contains(phrase, case=False, na=False, regex=False)
-        theme_mask = df["Theme"].str.contains(phrase, case=False, na=False, regex=False)
-        mask = mask | title_mask | theme_mask
-
-    return mask
+    # Acronyms case-sensitive, long-form phrase case-insensitive
+    return title_or_theme_contains(df, DDRI_ACRONYMS_RE) | title_or_theme_contains(df, DDRI_PHRASES_RE)
+
+# One alternation per drug filter instead of one Title scan per keyword
+DRUG_FILTER_PATTERNS = {name: compile_terms(config["keywords"])
+                        for name, config in ESMO_DRUG_FILTERS.items() if config.get("keywords")}
+
+THERAPEUTIC_AREA_FILTERS = {
+    "Bladder Cancer": apply_bladder_cancer_filter,
+    "Renal Cancer": apply_renal_cancer_filter,
+    "Lung Cancer": apply_lung_cancer_filter,
+    "Colorectal Cancer": apply_colorectal_cancer_filter,
+    "Head and Neck Cancer": apply_head_neck_cancer_filter,
+    "TGCT": apply_tgct_filter,
+    "DNA Damage Response (DDRi)": apply_ddri_filter,
+}
 
 def apply_therapeutic_area_filter(df: pd.DataFrame, ta_filter: str) -> pd.Series:
-    """Apply therapeutic area filter by name."""
-    if ta_filter == "All Therapeutic Areas":
-        return pd.Series([True] * len(df), index=df.index)
-    elif ta_filter == "Bladder Cancer":
-        return apply_bladder_cancer_filter(df)
-    elif ta_filter == "Renal Cancer":
-        return apply_renal_cancer_filter(df)
-    elif ta_filter == "Lung Cancer":
-        return apply_lung_cancer_filter(df)
-    elif ta_filter == "Colorectal Cancer":
-        return apply_colorectal_cancer_filter(df)
-    elif ta_filter == "Head and Neck Cancer":
-        return apply_head_neck_cancer_filter(df)
-    elif ta_filter == "TGCT":
-        return apply_tgct_filter(df)
-    elif ta_filter == "DNA Damage Response (DDRi)":
-        return apply_ddri_filter(df)
-    else:
-        return pd.Series([True] * len(df), index=df.index)
+    """Apply therapeutic area filter by name ("All Therapeutic Areas" or unknown names match everything)."""
+    filter_func = THERAPEUTIC_AREA_FILTERS.get(ta_filter)
+    if filter_func is None:
+        return pd.Series(True, index=df.index)
+    return filter_func(df)
+
+@lru_cache(maxsize=16)
+def cached_therapeutic_area_mask(ta_filter: str, csv_hash: str) -> pd.Series:
+    """TA mask over df_global, memoized per dataset version (csv_hash) - treat as read-only."""
+    return apply_therapeutic_area_filter(df_global, ta_filter)
+
+@lru_cache(maxsize=2)
+def cached_unique_rows_mask(csv_hash: str) -> pd.Series:
+    """First-occurrence mask of df_global rows (duplicate rows hash once per dataset version)."""
+    return ~df_global.duplicated()
 
 # ============================================================================
 # MULTI-FILTER LOGIC (Main Filtering Function)
@@ -1061,9 +1055,6 @@ def get_filtered_dataframe_multi(drug_filters: List[str], ta_filters: List[str],
     if df_global is None:
         return pd.DataFrame()
 
-    # Start with empty mask (all False)
-    combined_mask = pd.Series([False] * len(df_global), index=df_global.index)
-
     # If no filters selected, return all data (chat will use semantic search to find relevant subset)
     if not drug_filters and not ta_filters and not session_filters and not date_filters:
         return df_global
@@ -1084,25 +1075,25 @@ def get_filtered_dataframe_multi(drug_filters: List[str], ta_filters: List[str],
         date_filters = ["All Dates"]
 
     # Start with all True - each filter will AND to narrow down results
-    combined_mask = pd.Series([True] * len(df_global), index=df_global.index)
+    combined_mask = pd.Series(True, index=df_global.index)
 
     # Apply drug filters (OR across multiple drug selections, AND with other filter types)
     if drug_filters and "All Drugs" not in drug_filters and "Competitive Landscape" not in drug_filters:
-        drug_combined_mask = pd.Series([False] * len(df_global), index=df_global.index)
+        drug_combined_mask = pd.Series(False, index=df_global.index)
         for drug_filter in drug_filters:
             drug_config = ESMO_DRUG_FILTERS.get(drug_filter, {})
-            keywords = drug_config.get("keywords", [])
+            keyword_pattern = DRUG_FILTER_PATTERNS.get(drug_filter)
 
             # Build drug keyword mask
-            drug_mask = pd.Series([False] * len(df_global), index=df_global.index)
-            if keywords:
-                for keyword in keywords:
-                    drug_mask = drug_mask | df_global["Title"].str.contains(keyword, case=False, na=False, regex=False)
+            if keyword_pattern is not None:
+                drug_mask = df_global["Title"].str.contains(keyword_pattern, na=False)
+            else:
+                drug_mask = pd.Series(False, index=df_global.index)
 
             # If drug has indication-specific TA filter (e.g., Cetuximab H&N vs CRC), apply it
             if "ta_filter" in drug_config:
                 ta_name = drug_config["ta_filter"]
-                ta_mask = apply_therapeutic_area_filter(df_global, ta_name)
+                ta_mask = cached_therapeutic_area_mask(ta_name, csv_hash_global)
                 drug_mask = drug_mask & ta_mask
 
             drug_combined_mask = drug_combined_mask | drug_mask
@@ -1110,17 +1101,19 @@ def get_filtered_dataframe_multi(drug_filters: List[str], ta_filters: List[str],
         combined_mask = combined_mask & drug_combined_mask
 
     # Apply TA filters (OR across multiple TA selections, AND with other filter types)
-    if ta_filters and "All Therapeutic Areas" not in ta_filters:
-        ta_combined_mask = pd.Series([False] * len(df_global), index=df_global.index)
+    # An unrecognized TA name matches everything in apply_therapeutic_area_filter, which
+    # makes the OR a no-op - skip the keyword scans for the other selections in that case
+    if ta_filters and "All Therapeutic Areas" not in ta_filters and all(ta in THERAPEUTIC_AREA_FILTERS for ta in ta_filters):
+        ta_combined_mask = pd.Series(False, index=df_global.index)
         for ta_filter in ta_filters:
-            ta_mask = apply_therapeutic_area_filter(df_global, ta_filter)
+            ta_mask = cached_therapeutic_area_mask(ta_filter, csv_hash_global)
             ta_combined_mask = ta_combined_mask | ta_mask
         combined_mask = combined_mask & ta_combined_mask
 
     # Apply session filters (OR across multiple session selections, AND with other filter types)
     # Use EXACT matching to distinguish "Poster" from "ePoster"
     if session_filters and "All Session Types" not in session_filters:
-        session_combined_mask = pd.Series([False] * len(df_global), index=df_global.index)
+        session_combined_mask = pd.Series(False, index=df_global.index)
         for session_filter in session_filters:
             if session_filter == "Symposia":
                 # Special handling: Match any session containing "Symposium" EXCEPT "Industry-Sponsored Symposium"
@@ -1130,24 +1123,22 @@ def get_filtered_dataframe_multi(drug_filters: List[str], ta_filters: List[str],
             else:
                 session_types = ESMO_SESSION_TYPES.get(session_filter, [])
                 if session_types:
-                    for session_type in session_types:
-                        session_combined_mask = session_combined_mask | (df_global["Session"] == session_type)
+                    session_combined_mask = session_combined_mask | df_global["Session"].isin(session_types)
         combined_mask = combined_mask & session_combined_mask
 
     # Apply date filters (OR across multiple date selections, AND with other filter types)
     # Use EXACT matching for dates
     if date_filters and "All Dates" not in date_filters:
-        date_combined_mask = pd.Series([False] * len(df_global), index=df_global.index)
+        date_combined_mask = pd.Series(False, index=df_global.index)
         for date_filter in date_filters:
             dates = ESMO_DATES.get(date_filter, [])
             if dates:
-                for date in dates:
-                    date_combined_mask = date_combined_mask | (df_global["Date"] == date)
+                date_combined_mask = date_combined_mask | df_global["Date"].isin(dates)
         combined_mask = combined_mask & date_combined_mask
 
-    # Apply combined mask and deduplicate
-    filtered_df = df_global[combined_mask].copy()
-    filtered_df = filtered_df.drop_duplicates()
+    # Apply combined mask and deduplicate (identical rows always share a mask value, so
+    # dropping global duplicates up front equals drop_duplicates on the filtered subset)
+    filtered_df = df_global[combined_mask & cached_unique_rows_mask(csv_hash_global)]
 
     return filtered_df
 
@@ -1155,120 +1146,15 @@ def get_filtered_dataframe_multi(drug_filters: List[str], ta_filters: List[str],
 # SEARCH LOGIC
 # ============================================================================
 
-def parse_boolean_query(query: str, df: pd.DataFrame, search_columns: list) -> pd.Series:
-    """Parse boolean search with AND, OR, NOT operators."""
-    # If no boolean operators, use simple search
-    if not any(op in query.upper() for op in ['AND', 'OR', 'NOT']):
-        return execute_simple_search(query, df, search_columns)
-
-    # Parse the query into tokens and operators
-    # Split by AND, OR while preserving case for search terms
-    terms = []
-    operators = []
-
-    # Split query by boolean operators (case-insensitive)
-    parts = re.split(r'\s+(AND|OR|NOT)\s+', query, flags=re.IGNORECASE)
-
-    i = 0
-    while i < len(parts):
-        part = parts[i].strip()
-        if not part:
-            i += 1
-            continue
-
-        if part.upper() in ['AND', 'OR', 'NOT']:
-            operators.append(part.upper())
-            i += 1
-        else:
-            terms.append(part)
-            i += 1
-
-    # Build result mask
-    if not terms:
-        return pd.Series([False] * len(df), index=df.index)
-
-    # Start with first term
-    result_mask = execute_simple_search(terms[0], df, search_columns)
-
-    # Process remaining terms with operators
-    term_idx = 1
-    op_idx = 0
-
-    while term_idx < len(terms) and op_idx < len(operators):
-        operator = operators[op_idx]
-
-        if operator == 'NOT' and term_idx < len(terms):
-            # NOT negates the next term and combines with previous result using AND
-            not_mask = ~execute_simple_search(terms[term_idx], df, search_columns)
-            result_mask = result_mask & not_mask
-            term_idx += 1
-            op_idx += 1
-        elif operator == 'AND' and term_idx < len(terms):
-            term_mask = execute_simple_search(terms[term_idx], df, search_columns)
-            result_mask = result_mask & term_mask
-            term_idx += 1
-            op_idx += 1
-        elif operator == 'OR' and term_idx < len(terms):
-            term_mask = execute_simple_search(terms[term_idx], df, search_columns)
-            result_mask = result_mask | term_mask
-            term_idx += 1
-            op_idx += 1
-        else:
-            op_idx += 1
-
-    return result_mask
-
-def execute_simple_search(keyword: str, df: pd.DataFrame, search_columns: list) -> pd.Series:
-    """Execute smart search with quote support for exact matching."""
-    # Initialize mask with same index as df to avoid index misalignment
-    mask = pd.Series([False] * len(df), index=df.index)
-
-    # Check if query is quoted (for exact match)
-    is_quoted = (keyword.startswith('"') and keyword.endswith('"')) or (keyword.startswith("'") and keyword.endswith("'"))
+@lru_cache(maxsize=2)
+def cached_search_text(csv_hash: str) -> Optional[pd.Series]:
+    """build_search_text(df_global), case-folded once per dataset version."""
+    return build_search_text(df_global)
 
-    # ESMO columns (using original CSV names)
-    esmo_columns = ['Title', 'Speakers', 'Speaker Location', 'Affiliation', 'Identifier', 'Room', 'Date', 'Time', 'Session', 'Theme']
-    actual_columns = [col for col in esmo_columns if col in df.columns]
-
-    if is_quoted:
-        # Strip quotes and use exact matching with word boundaries
-        keyword = keyword.strip('"').strip("'")
-        # Use word boundaries for exact match (prevents "ATM" from matching "treatment")
-        search_pattern = r'\b' + re.escape(keyword) + r'\b'
-
-        for col in actual_columns:
-            try:
-                # Case-sensitive for quoted searches to match acronyms exactly
-                col_mask = df[col].astype(str).str.contains(search_pattern, case=True, na=False, regex=True)
-                mask = mask | col_mask
-            except Exception as e:
-                continue
-    else:
-        # No quotes - use standard smart search
-        # Check if multi-word query (contains space)
-        is_multi_word = ' ' in keyword
-
-        if is_multi_word:
-            # Multi-word query: Use exact phrase matching with word boundaries
-            # This prevents "mini oral" from matching "medical oral nutrition"
-            search_pattern = r'\b' + re.escape(keyword) + r'\b'
-            for col in actual_columns:
-                try:
-                    col_mask = df[col].astype(str).str.contains(search_pattern, case=False, na=False, regex=True)
-                    mask = mask | col_mask
-                except Exception as e:
-                    continue
-        else:
-            # Single word query: Use partial substring matching
-            # This allows "avel" to match "avelumab"
-            for col in actual_columns:
-                try:
-                    col_mask = df[col].astype(str).str.contains(keyword, case=False, na=False, regex=False)
-                    mask = mask | col_mask
-                except Exception as e:
-                    continue
-
-    return mask
+def search_dataframe(keyword: str, df: pd.DataFrame, search_columns: list) -> pd.Series:
+    """parse_boolean_query over df, reusing the cached search text when df is the full dataset."""
+    search_text = cached_search_text(csv_hash_global) if df is df_global else None
+    return parse_boolean_query(keyword, df, search_columns, search_text)
 
 def highlight_search_results(df: pd.DataFrame, keyword: str) -> pd.DataFrame:
     """Add HTML highlighting to search results."""
@@ -1280,99 +1166,106 @@ def highlight_search_results(df: pd.DataFrame, keyword: str) -> pd.DataFrame:
     # Columns to highlight
     cols_to_highlight = ['Title', 'Speakers', 'Affiliation', 'Speaker Location', 'Session', 'Theme']
 
+    if not keyword:
+        return df_highlighted
+
+    # Compiled once per search instead of looked up per cell
+    keyword_pattern = re.compile(f'({re.escape(keyword)})', re.IGNORECASE)
+
     for col in cols_to_highlight:
         if col in df_highlighted.columns:
             df_highlighted[col] = df_highlighted[col].astype(str).apply(
-                lambda x: re.sub(
-                    f'({re.escape(keyword)})',
-                    r'<mark>\1</mark>',
-                    x,
-                    flags=re.IGNORECASE
-                ) if keyword else x
+                lambda x: keyword_pattern.sub(r'<mark>\1</mark>', x)
             )
 
     return df_highlighted
 
-# ============================================================================
-# SMART QUERY CLASSIFICATION (GPT-5-MINI)
-# ============================================================================
+def semantic_search(query: str, filtered_df: pd.DataFrame, n: int = 20) -> pd.DataFrame:
+    """Return the studies in filtered_df most similar to query (falls back to first n rows)."""
+    relevant_data = filtered_df.head(n)
 
-def classify_user_query(user_message: str, conversation_history: list = None) -> dict:
-    """
-    Use GPT-5-mini to classify user query and extract search parameters.
-    Returns structured JSON for dataset querying and table generation.
-    """
-    # Build conversation context if available
-    history_context = ""
-    if conversation_history and len(conversation_history) > 0:
-        recent = conversation_history[-2:]  # Last 2 exchanges
-        history_lines = []
-        for exchange in recent:
-            history_lines.append(f"User: {exchange.get('user', '')}")
-            history_lines.append(f"Assistant: {exchange.get('assistant', '')[:200]}...")  # Truncate AI response
-        history_context = "\n\n**CONVERSATION CONTEXT** (use to resolve pronouns like 'him', 'it', 'that'):\n" + "\n".join(history_lines)
+    if collection:
+        try:
+            # Only the ids are used (rows come from df_global) - skip documents/metadatas/distances payload
+            results = collection.query(
+                query_texts=[query],
+                n_results=min(n, len(filtered_df)),
+                include=[]
+            )
 
-    classification_prompt = f"""You are a query classifier for ESMO 2025 conference intelligence. Think like a medical affairs professional attending the conference.
+            if results and results['ids']:
+                result_indices = [int(doc_id.replace('doc_', '')) for doc_id in results['ids'][0]]
+                relevant_data = df_global.iloc[result_indices]
+                # k hits probed against filtered_df's index (hash lookups) instead of isin hashing all N labels
+                filtered_index = filtered_df.index
+                relevant_data = relevant_data[[label in filtered_index for label in relevant_data.index]]
+        except Exception as e:
+            print(f"[SEMANTIC SEARCH] Error: {e}")
 
-**USER QUERY**: "{user_message}"{history_context}
+    return relevant_data
+
+# ============================================================================
+# SMART QUERY CLASSIFICATION (GPT-5-MINI)
+# ============================================================================
 
-**YOUR TASK**: Classify the query intent and return JSON for intelligent table generation. Use conversation context to resolve pronouns.
+# Static part of the classifier prompt (built once; only the query/history head is per-call)
+CLASSIFICATION_PROMPT_RULES = """**YOUR TASK**: Classify the query intent and return JSON for intelligent table generation. Use conversation context to resolve pronouns.
 
 **AVAILABLE DATA**: Title, Speakers, Speaker Location, Affiliation, Identifier, Room, Date, Time, Session, Theme
 
 **RETURN FORMAT** (JSON only, no explanation):
-{{
+{
   "entity_type": "drug" | "hcp" | "institution" | "session_type" | "date" | "therapeutic_area" | "drug_class" | "general" | "clarification_needed",
   "search_terms": ["term1", "term2"],
   "generate_table": true | false,
   "table_type": "author_publications" | "author_ranking" | "drug_studies" | "drug_class_ranking" | "institution_ranking" | "session_list" | null,
   "clarification_question": "Ask user for specifics if query is too vague" or null,
-  "filter_context": {{
+  "filter_context": {
     "drug": "drug name if mentioned" or null,
     "ta": "therapeutic area if mentioned" or null,
     "date": "Day X if mentioned" or null,
     "session": "session type if mentioned" or null
-  }},
+  },
   "top_n": 10
-}}
+}
 
 **CLASSIFICATION PATTERNS** (95%+ coverage):
 
 **1. SPECIFIC PERSON QUERIES** (author_publications table)
 "Who is Andrea Necchi?" | "Tell me about Dr. Necchi" | "Necchi publications" | "What is Andrea Necchi presenting?"
-→ {{"entity_type": "hcp", "search_terms": ["Andrea Necchi", "Necchi"], "generate_table": true, "table_type": "author_publications", "filter_context": {{}}, "top_n": 20}}
+→ {"entity_type": "hcp", "search_terms": ["Andrea Necchi", "Necchi"], "generate_table": true, "table_type": "author_publications", "filter_context": {}, "top_n": 20}
 
 **2. TOP AUTHORS/SPEAKERS QUERIES** (author_ranking table)
 "Who are the most active speakers?" | "Top 10 authors" | "Most prolific researchers" | "Leading KOLs" | "Who's presenting the most?"
-→ {{"entity_type": "hcp", "search_terms": [], "generate_table": true, "table_type": "author_ranking", "filter_context": {{}}, "top_n": 10}}
+→ {"entity_type": "hcp", "search_terms": [], "generate_table": true, "table_type": "author_ranking", "filter_context": {}, "top_n": 10}
 
 **3. SPECIFIC DRUG QUERIES** (drug_studies table)
 "What is enfortumab vedotin?" | "Tell me about EV" | "Avelumab data" | "Studies on pembrolizumab" | "Keytruda results"
-→ {{"entity_type": "drug", "search_terms": ["enfortumab vedotin", "EV", "enfortumab"], "generate_table": true, "table_type": "drug_studies", "filter_context": {{"drug": "enfortumab vedotin"}}, "top_n": 20}}
+→ {"entity_type": "drug", "search_terms": ["enfortumab vedotin", "EV", "enfortumab"], "generate_table": true, "table_type": "drug_studies", "filter_context": {"drug": "enfortumab vedotin"}, "top_n": 20}
 
 **4. DRUG CLASS/MOA QUERIES** (drug_class_ranking table)
 "What is the most common drug class?" | "Show me drug classes" | "ADC vs ICI representation" | "Top MOA classes" | "What mechanisms are being studied?"
-→ {{"entity_type": "drug_class", "search_terms": [], "generate_table": true, "table_type": "drug_class_ranking", "filter_context": {{}}, "top_n": 15}}
+→ {"entity_type": "drug_class", "search_terms": [], "generate_table": true, "table_type": "drug_class_ranking", "filter_context": {}, "top_n": 15}
 
 **5. INSTITUTION QUERIES** (institution_ranking table)
 "Most active institutions" | "Top 15 hospitals" | "Leading research centers" | "Where is the research coming from?" | "Academic centers in bladder cancer"
-→ {{"entity_type": "institution", "search_terms": [], "generate_table": true, "table_type": "institution_ranking", "filter_context": {{}}, "top_n": 15}}
+→ {"entity_type": "institution", "search_terms": [], "generate_table": true, "table_type": "institution_ranking", "filter_context": {}, "top_n": 15}
 
 **6. SESSION/SCHEDULE QUERIES** (session_list table)
 "What posters are on day 3?" | "All presentations on Friday" | "Proffered papers in lung cancer" | "When are the oral sessions?" | "Show me symposia"
-→ {{"entity_type": "session_type", "search_terms": ["poster"], "generate_table": true, "table_type": "session_list", "filter_context": {{"date": "Day 3"}}, "top_n": 50}}
+→ {"entity_type": "session_type", "search_terms": ["poster"], "generate_table": true, "table_type": "session_list", "filter_context": {"date": "Day 3"}, "top_n": 50}
 
 **7. TREND/ANALYSIS QUERIES** (no table, just AI analysis)
 "What are the latest trends?" | "Summarize immunotherapy data" | "Key takeaways" | "Emerging biomarkers" | "What's new in checkpoint inhibitors?"
-→ {{"entity_type": "general", "search_terms": ["immunotherapy", "checkpoint"], "generate_table": false, "table_type": null, "filter_context": {{}}, "top_n": 15}}
+→ {"entity_type": "general", "search_terms": ["immunotherapy", "checkpoint"], "generate_table": false, "table_type": null, "filter_context": {}, "top_n": 15}
 
 **8. COMPARATIVE QUERIES** (generate_table: false, AI will analyze)
 "Compare avelumab vs pembrolizumab" | "EV+pembro vs EV alone" | "ADCs vs ICIs" | "Phase 3 vs Phase 2 data"
-→ {{"entity_type": "general", "search_terms": ["avelumab", "pembrolizumab", "comparison"], "generate_table": false, "table_type": null, "filter_context": {{}}, "top_n": 20}}
+→ {"entity_type": "general", "search_terms": ["avelumab", "pembrolizumab", "comparison"], "generate_table": false, "table_type": null, "filter_context": {}, "top_n": 20}
 
 **9. VAGUE/UNCLEAR QUERIES** (ask for clarification)
 "Tell me more" | "What else?" | "Interesting" | "Update me"
-→ {{"entity_type": "clarification_needed", "clarification_question": "What specific topic, drug, researcher, or therapeutic area would you like to explore?", "generate_table": false, "table_type": null, "filter_context": {{}}, "top_n": 10}}
+→ {"entity_type": "clarification_needed", "clarification_question": "What specific topic, drug, researcher, or therapeutic area would you like to explore?", "generate_table": false, "table_type": null, "filter_context": {}, "top_n": 10}
 
 **KEY RULES**:
 - Extract NUMBER from query ("top 15" → top_n: 15)
@@ -1390,6 +1283,57 @@ def classify_user_query(user_message: str, conversation_history: list = None) ->
 
 **THERAPEUTIC AREAS**: bladder/urothelial cancer, NSCLC, lung cancer, colorectal (CRC), head & neck (H&N, HNSCC), renal (RCC), gastric, breast, melanoma"""
 
+# Exact-match cache of classifier responses (raw JSON text) keyed by prompt digest - LRU, bounded
+CLASSIFICATION_CACHE_SIZE = 64
+classification_cache = OrderedDict()
+classification_cache_lock = threading.Lock()
+
+def default_classification() -> dict:
+    """Fallback classification: general query, no table (used when the classifier is unavailable)."""
+    return {
+        "entity_type": "general",
+        "search_terms": [],
+        "generate_table": False,
+        "table_type": None,
+        "filter_context": {},
+        "top_n": 15
+    }
+
+def classify_user_query(user_message: str, conversation_history: list = None) -> dict:
+    """
+    Use GPT-5-mini to classify user query and extract search parameters.
+    Returns structured JSON for dataset querying and table generation.
+    """
+    # No client - skip building the prompt and the doomed API call
+    if not client:
+        print("[QUERY CLASSIFICATION] OpenAI client not configured, using general classification")
+        return default_classification()
+
+    # Build conversation context if available
+    history_context = ""
+    if conversation_history and len(conversation_history) > 0:
+        recent = conversation_history[-2:]  # Last 2 exchanges
+        history_lines = []
+        for exchange in recent:
+            history_lines.append(f"User: {exchange.get('user', '')}")
+            history_lines.append(f"Assistant: {exchange.get('assistant', '')[:200]}...")  # Truncate AI response
+        history_context = "\n\n**CONVERSATION CONTEXT** (use to resolve pronouns like 'him', 'it', 'that'):\n" + "\n".join(history_lines)
+
+    classification_prompt = f"""You are a query classifier for ESMO 2025 conference intelligence. Think like a medical affairs professional attending the conference.
+
+**USER QUERY**: "{user_message}"{history_context}
+
+""" + CLASSIFICATION_PROMPT_RULES
+
+    cache_key = hashlib.blake2b(classification_prompt.encode('utf-8'), digest_size=16).digest()
+    with classification_cache_lock:
+        cached_text = classification_cache.get(cache_key)
+        if cached_text is not None:
+            classification_cache.move_to_end(cache_key)
+    if cached_text is not None:
+        print("[QUERY CLASSIFICATION] Cache hit")
+        return json.loads(cached_text)
+
     try:
         response = client.responses.create(
             model="gpt-5-mini",
@@ -1400,27 +1344,31 @@ def classify_user_query(user_message: str, conversation_history: list = None) ->
         )
 
         classification = json.loads(response.output_text)
+
+        # Only successfully parsed responses are cached; errors fall through to the default below
+        with classification_cache_lock:
+            classification_cache[cache_key] = response.output_text
+            if len(classification_cache) > CLASSIFICATION_CACHE_SIZE:
+                classification_cache.popitem(last=False)
+
         return classification
 
     except Exception as e:
         print(f"[CLASSIFICATION ERROR] {e}")
-        return {
-            "entity_type": "general",
-            "search_terms": [],
-            "generate_table": False,
-            "table_type": None,
-            "filter_context": {},
-            "top_n": 15
-        }
+        return default_classification()
 
 
 def apply_filters_from_context(df: pd.DataFrame, filter_context: dict) -> pd.DataFrame:
-    """Apply filters based on classification context."""
-    filtered = df.copy()
+    """Apply filters based on classification context (read-only: each step selects a new frame)."""
+    filtered = df
+
+    ta_name = filter_context.get("ta")
+    drug_name = filter_context.get("drug")
+    session_name = filter_context.get("session")
+    date_str = filter_context.get("date")
 
     # Apply TA filter using ESMO_THERAPEUTIC_AREAS
-    if filter_context.get("ta"):
-        ta_name = filter_context["ta"]
+    if ta_name:
         # Try to find matching TA in ESMO_THERAPEUTIC_AREAS (case-insensitive)
         ta_config = None
         for key, config in ESMO_THERAPEUTIC_AREAS.items():
@@ -1429,55 +1377,77 @@ def apply_filters_from_context(df: pd.DataFrame, filter_context: dict) -> pd.Dat
                 break
 
         if ta_config and ta_config.get("keywords"):
-            mask = pd.Series([False] * len(filtered))
-            for keyword in ta_config["keywords"]:
-                mask |= filtered['Title'].str.contains(keyword, case=False, na=False)
+            # One scan per keyword list (any keyword matches), mask stays aligned with filtered's index
+            mask = filtered['Title'].str.contains(compile_regex_terms(tuple(ta_config["keywords"])), na=False)
 
             # Apply exclusions if present
             if ta_config.get("exclusions"):
-                for exclusion in ta_config["exclusions"]:
-                    mask &= ~filtered['Title'].str.contains(exclusion, case=False, na=False)
+                mask &= ~filtered['Title'].str.contains(compile_regex_terms(tuple(ta_config["exclusions"])), na=False)
 
             filtered = filtered[mask]
         else:
             # Fallback to direct keyword search
-            mask = filtered['Title'].str.contains(filter_context["ta"], case=False, na=False)
+            mask = filtered['Title'].str.contains(ta_name, case=False, na=False)
             filtered = filtered[mask]
 
     # Apply drug filter - just search for the drug name in Title
-    if filter_context.get("drug"):
-        drug_name = filter_context["drug"]
+    if drug_name:
         mask = filtered['Title'].str.contains(drug_name, case=False, na=False)
         filtered = filtered[mask]
 
     # Apply session filter
-    if filter_context.get("session"):
-        filtered = filtered[filtered['Session'].str.contains(filter_context["session"], case=False, na=False)]
+    if session_name:
+        filtered = filtered[filtered['Session'].str.contains(session_name, case=False, na=False)]
 
     # Apply date filter
-    if filter_context.get("date"):
+    if date_str:
         # Extract date pattern (e.g., "Day 3" -> "10/19/2025")
-        date_str = filter_context["date"]
         if "day" in date_str.lower():
             date_config = ESMO_DATES.get(date_str, [])
             if date_config:
-                mask = pd.Series([False] * len(filtered))
-                for date_val in date_config:
-                    mask |= filtered['Date'].str.contains(date_val, case=False, na=False)
-                filtered = filtered[mask]
+                filtered = filtered[filtered['Date'].str.contains(compile_regex_terms(tuple(date_config)), na=False)]
         else:
             filtered = filtered[filtered['Date'].str.contains(date_str, case=False, na=False)]
 
     return filtered
 
 
+@lru_cache(maxsize=128)
+def compile_drug_search_terms(terms: Tuple[str, ...]) -> re.Pattern:
+    """One alternation for drug search terms; each term keeps its own case rule via scoped flags."""
+    parts = []
+    for term in terms:
+        # Use word boundaries for short acronyms (3 chars or less) to avoid false matches
+        # Example: "BDC" should not match "BDC-4182"
+        if len(term) <= 3 and term.isupper():
+            # For short uppercase acronyms, use word boundaries (case-sensitive)
+            # Also handle plural forms (e.g., "ADC" matches both "ADC" and "ADCs")
+            parts.append(r'\b' + re.escape(term) + r's?\b')
+        elif len(term) == 4 and term.endswith('s') and term[:3].isupper():
+            # Handle plural acronyms like "ADCs" -> search for "ADC" or "ADCs"
+            parts.append(r'\b' + re.escape(term[:-1]) + r's?\b')
+        else:
+            # For longer terms or mixed case, use regular case-insensitive (regex) search
+            parts.append(f'(?i:{term})')
+    return re.compile('|'.join(parts))
+
+ENTITY_TABLE_TYPES = {"author_publications", "author_ranking", "drug_studies", "institution_ranking",
+                      "drug_class_ranking", "session_list"}
+
 def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
     """Generate appropriate table based on classification."""
 
     table_type = classification.get("table_type")
+
+    # Unknown/missing table type: no table, skip the filtering work below
+    if table_type not in ENTITY_TABLE_TYPES:
+        return "", pd.DataFrame()
+
     search_terms = classification.get("search_terms", [])
     filter_ctx = classification.get("filter_context", {})
     top_n = classification.get("top_n", 10)
+    ctx_ta = filter_ctx.get('ta')
+    ctx_drug = filter_ctx.get('drug')
 
     # For entity searches (drug, author), search the FULL dataset first
     # Then optionally narrow by TA/date AFTER finding the entity
@@ -1485,7 +1455,7 @@ def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
 
     if table_type in ["drug_studies", "author_publications"]:
         # Use full dataset for entity search (find specific drug/author regardless of filters)
-        filtered_df = df.copy()
+        filtered_df = df
     else:
         # Apply filter context for ranking/aggregation tables (author_ranking, institution_ranking, etc.)
         filtered_df = apply_filters_from_context(df, filter_ctx)
@@ -1497,12 +1467,9 @@ def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
 
         print(f"[AUTHOR SEARCH] Searching for: {search_terms} in {len(filtered_df)} records")
 
-        mask = pd.Series([False] * len(filtered_df))
-        for term in search_terms:
-            term_mask = filtered_df['Speakers'].str.contains(term, case=False, na=False)
-            matches = term_mask.sum()
-            print(f"[AUTHOR SEARCH] Term '{term}' found {matches} matches")
-            mask |= term_mask
+        # Any search term matches: one scan of Speakers with the terms as a single alternation
+        mask = filtered_df['Speakers'].str.contains(compile_regex_terms(tuple(search_terms)), na=False)
+        print(f"[AUTHOR SEARCH] Terms {search_terms} found {mask.sum()} matches")
 
         results = filtered_df[mask][['Identifier', 'Title', 'Speakers', 'Affiliation', 'Session', 'Room', 'Date']].head(top_n)
 
@@ -1536,10 +1503,10 @@ def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
             return no_results_html, ranking_df
 
         context_str = ""
-        if filter_ctx.get('ta'):
-            context_str = f" in {filter_ctx.get('ta')}"
-        elif filter_ctx.get('drug'):
-            context_str = f" for {filter_ctx.get('drug')}"
+        if ctx_ta:
+            context_str = f" in {ctx_ta}"
+        elif ctx_drug:
+            context_str = f" for {ctx_drug}"
 
         table_html = f"""<div class='entity-table-container'>
 <h6 class='entity-table-title'>📊 Top {top_n} Most Active Speakers{context_str}</h6>
@@ -1554,48 +1521,30 @@ def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
 
         print(f"[DRUG SEARCH] Searching for: {search_terms} in {len(filtered_df)} records")
 
-        # Load drug database to get MOA info
-        try:
-            drug_db_path = Path(__file__).parent / "Drug_Company_names.csv"
-            drug_db = pd.read_csv(drug_db_path, encoding='utf-8-sig')
-        except Exception as e:
-            print(f"[DRUG SEARCH] Could not load Drug_Company_names.csv: {e}")
-            drug_db = None
-
-        mask = pd.Series([False] * len(filtered_df))
-        for term in search_terms:
-            # Use word boundaries for short acronyms (3 chars or less) to avoid false matches
-            # Example: "BDC" should not match "BDC-4182"
-            if len(term) <= 3 and term.isupper():
-                # For short uppercase acronyms, use word boundaries
-                # Also handle plural forms (e.g., "ADC" matches both "ADC" and "ADCs")
-                pattern = r'\b' + re.escape(term) + r's?\b'
-                term_mask = filtered_df['Title'].str.contains(pattern, case=True, na=False, regex=True)
-            elif len(term) == 4 and term.endswith('s') and term[:3].isupper():
-                # Handle plural acronyms like "ADCs" -> search for "ADC" or "ADCs"
-                singular = term[:-1]  # Remove 's'
-                pattern = r'\b' + re.escape(singular) + r's?\b'
-                term_mask = filtered_df['Title'].str.contains(pattern, case=True, na=False, regex=True)
-            else:
-                # For longer terms or mixed case, use regular case-insensitive search
-                term_mask = filtered_df['Title'].str.contains(term, case=False, na=False)
-            matches = term_mask.sum()
-            print(f"[DRUG SEARCH] Term '{term}' found {matches} matches")
-            mask |= term_mask
+        # All terms in one Title scan (any term matches)
+        mask = filtered_df['Title'].str.contains(compile_drug_search_terms(tuple(search_terms)), na=False)
+        print(f"[DRUG SEARCH] Terms {search_terms} found {mask.sum()} matches")
 
         results = filtered_df[mask][['Identifier', 'Title', 'Speakers', 'Affiliation', 'Session', 'Room', 'Date']].head(top_n)
 
-        # Try to find MOA info for the searched drug
+        # Try to find MOA info for the searched drug (only needed when there are results to label)
         moa_class = "Unknown"
         moa_target = "Unknown"
-        if drug_db is not None and search_terms:
+        drug_db = None
+        if not results.empty:
+            try:
+                drug_db = load_drug_database()
+            except Exception as e:
+                print(f"[DRUG SEARCH] Could not load Drug_Company_names.csv: {e}")
+
+        if drug_db is not None:
             search_term = search_terms[0].lower()
-            for _, drug_row in drug_db.iterrows():
-                commercial = str(drug_row['drug_commercial']).lower() if pd.notna(drug_row['drug_commercial']) else ""
-                generic = str(drug_row['drug_generic']).lower() if pd.notna(drug_row['drug_generic']) else ""
+            for drug_row in drug_db.itertuples(index=False):
+                commercial = drug_row.drug_commercial.lower()
+                generic = drug_row.drug_generic.lower()
                 if search_term in commercial or search_term in generic or commercial in search_term or generic in search_term:
-                    moa_class = str(drug_row['moa_class']) if pd.notna(drug_row['moa_class']) else "Unknown"
-                    moa_target = str(drug_row['moa_target']) if pd.notna(drug_row['moa_target']) else "Unknown"
+                    moa_class = drug_row.moa_class or "Unknown"
+                    moa_target = drug_row.moa_target or "Unknown"
                     break
 
         # Add MOA columns to results
@@ -1627,7 +1576,7 @@ def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
             'Publications': institution_counts.values
         })
 
-        context_str = f" in {filter_ctx.get('ta', 'all areas')}" if filter_ctx.get('ta') else ""
+        context_str = f" in {ctx_ta}" if ctx_ta else ""
         table_html = f"""<div class='entity-table-container'>
 <h6 class='entity-table-title'>🏥 Top {top_n} Most Active Institutions{context_str}</h6>
 {ranking_df.to_html(index=False, classes='table table-sm table-striped', escape=False)}
@@ -1639,28 +1588,35 @@ def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
         print(f"[DRUG CLASS RANKING] Analyzing {len(filtered_df)} studies")
 
         try:
-            drug_db_path = Path(__file__).parent / "Drug_Company_names.csv"
-            drug_db = pd.read_csv(drug_db_path, encoding='utf-8-sig')
+            drug_db = load_drug_database()
         except Exception as e:
             print(f"[DRUG CLASS RANKING] Could not load Drug_Company_names.csv: {e}")
             return "", pd.DataFrame()
 
-        # Count MOA classes by matching drugs in titles
-        moa_counts = {}
-        for idx, row in filtered_df.iterrows():
-            title = str(row['Title']).lower()
-            # Check each drug in database
-            for _, drug_row in drug_db.iterrows():
-                commercial = str(drug_row['drug_commercial']).lower() if pd.notna(drug_row['drug_commercial']) else ""
-                generic = str(drug_row['drug_generic']).lower() if pd.notna(drug_row['drug_generic']) else ""
-                moa_class = str(drug_row['moa_class']) if pd.notna(drug_row['moa_class']) else "Unknown"
+        # Count MOA classes by matching drugs in titles: one vectorized scan per drug
+        # (each title/drug hit adds 1 to the drug's class), lowercasing titles once
+        titles = filtered_df['Title'].astype(str).str.lower()
+        class_hits = Counter()
+        first_hit = {}  # class -> (title position, drug position) of its first hit, keeps scan order
+        for drug_pos, drug_row in enumerate(drug_db.itertuples(index=False)):
+            moa_class = drug_row.moa_class or "Unknown"
+            if moa_class == "Unknown":
+                continue
+
+            commercial = drug_row.drug_commercial.lower()
+            generic = drug_row.drug_generic.lower()
+            hits = pd.Series(False, index=titles.index)
+            if commercial:
+                hits |= titles.str.contains(commercial, regex=False)
+            if generic:
+                hits |= titles.str.contains(generic, regex=False)
 
-                if moa_class == "Unknown":
-                    continue
+            n_hits = int(hits.sum())
+            if n_hits:
+                class_hits[moa_class] += n_hits
+                first_hit[moa_class] = min(first_hit.get(moa_class, (len(titles), 0)), (int(hits.values.argmax()), drug_pos))
 
-                # Check if drug is in title
-                if (commercial and commercial in title) or (generic and generic in title):
-                    moa_counts[moa_class] = moa_counts.get(moa_class, 0) + 1
+        moa_counts = {moa_class: class_hits[moa_class] for moa_class in sorted(first_hit, key=first_hit.get)}
 
         if not moa_counts:
             no_results_html = f"""<div class='entity-table-container'>
@@ -1671,13 +1627,13 @@ def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
 
         # Create ranking dataframe
         ranking_df = pd.DataFrame(list(moa_counts.items()), columns=['MOA Class', '# Studies'])
-        ranking_df = ranking_df.sort_values('# Studies', ascending=False).head(top_n)
+        ranking_df = ranking_df.nlargest(top_n, '# Studies')
         ranking_df['Rank'] = range(1, len(ranking_df) + 1)
         ranking_df = ranking_df[['Rank', 'MOA Class', '# Studies']]
 
         context_str = ""
-        if filter_ctx.get('ta'):
-            context_str = f" in {filter_ctx.get('ta')}"
+        if ctx_ta:
+            context_str = f" in {ctx_ta}"
 
         table_html = f"""<div class='entity-table-container'>
 <h6 class='entity-table-title'>💊 Top {top_n} Drug Classes by Study Count{context_str}</h6>
@@ -1688,10 +1644,7 @@ def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
     elif table_type == "session_list":
         # Filter by session type
         if search_terms:
-            mask = pd.Series([False] * len(filtered_df))
-            for term in search_terms:
-                mask |= filtered_df['Session'].str.contains(term, case=False, na=False)
-            results = filtered_df[mask]
+            results = filtered_df[filtered_df['Session'].str.contains(compile_regex_terms(tuple(search_terms)), na=False)]
         else:
             results = filtered_df
 
@@ -1713,14 +1666,12 @@ def generate_entity_table(classification: dict, df: pd.DataFrame) -> tuple:
 def generate_top_authors_table(df: pd.DataFrame, n: int = 15) -> pd.DataFrame:
     """Generate top N authors by unique abstracts."""
     try:
-        print(f"[TABLE] generate_top_authors_table called with {len(df)} rows")
         if df.empty:
             print(f"[TABLE] Input dataframe is empty")
             return pd.DataFrame()
 
         # Filter out rows with empty/null speaker names before grouping
         df_with_speakers = df[df['Speakers'].notna() & (df['Speakers'].str.strip() != '')]
-        print(f"[TABLE] Found {len(df_with_speakers)} rows with speakers")
 
         if df_with_speakers.empty:
             print(f"[TABLE] No speakers found after filtering")
@@ -1734,9 +1685,9 @@ def generate_top_authors_table(df: pd.DataFrame, n: int = 15) -> pd.DataFrame:
         }).reset_index()
 
         author_counts.columns = ['Speaker', '# Studies', 'Affiliation', 'Location']
-        author_counts = author_counts.sort_values('# Studies', ascending=False).head(n)
+        author_counts = author_counts.nlargest(n, '# Studies')
 
-        print(f"[TABLE] Generated authors table with {len(author_counts)} rows")
+        print(f"[TABLE] Generated authors table with {len(author_counts)} rows ({len(df_with_speakers)}/{len(df)} rows with speakers)")
         return author_counts
 
     except Exception as e:
@@ -1745,101 +1696,107 @@ def generate_top_authors_table(df: pd.DataFrame, n: int = 15) -> pd.DataFrame:
         traceback.print_exc()
         return pd.DataFrame()
 
-def generate_top_institutions_table(df: pd.DataFrame, n: int = 15) -> pd.DataFrame:
-    """Generate top N institutions by unique abstracts."""
-    if df.empty:
-        return pd.DataFrame()
-
-    # Normalize institution names (extract main institution from complex affiliations)
-    def normalize_institution(affiliation):
-        if pd.isna(affiliation) or affiliation == '' or str(affiliation).strip() == '':
-            return None  # Return None for empty/invalid so we can filter out
-
-        # Remove department/division prefixes
-        aff = re.sub(r'^Department of [^,]+,\s*', '', str(affiliation), flags=re.IGNORECASE)
-        aff = re.sub(r'^Division of [^,]+,\s*', '', aff, flags=re.IGNORECASE)
-        aff = re.sub(r'^Institute of [^,]+,\s*', '', aff, flags=re.IGNORECASE)
-        aff = re.sub(r'^School of [^,]+,\s*', '', aff, flags=re.IGNORECASE)
-        aff = re.sub(r'^Faculty of [^,]+,\s*', '', aff, flags=re.IGNORECASE)
-        aff = re.sub(r'^Center for [^,]+,\s*', '', aff, flags=re.IGNORECASE)
-        aff = re.sub(r'^Centre for [^,]+,\s*', '', aff, flags=re.IGNORECASE)
-
-        # Extract main institution (first part before comma)
-        parts = aff.split(',')
-        if len(parts) > 0:
-            institution = parts[0].strip()
-
-            # Filter out generic terms and single city names
-            generic_terms = [
-                'department of medicine', 'school of medicine', 'institute of pathology',
-                'division of oncology', 'department of oncology', 'medical oncology',
-                'clinical oncology', 'radiation oncology', 'medicine', 'oncology',
-                'pathology', 'surgery', 'radiology', 'pharmacy'
-            ]
-
-            # Check if institution is too short (likely just a city) or generic
-            if len(institution) < 10 or institution.lower() in generic_terms:
-                # Try second part if available (might be the actual institution name)
-                if len(parts) > 1:
-                    institution = parts[1].strip()
-                    # Still filter out if too short
-                    if len(institution) < 10:
-                        return None
-                else:
+# Department/division prefixes stripped (in this order) before taking the main institution
+INSTITUTION_PREFIX_PATTERNS = [
+    re.compile(r'^' + prefix + r' [^,]+,\s*', re.IGNORECASE)
+    for prefix in ('Department of', 'Division of', 'Institute of', 'School of', 'Faculty of', 'Center for', 'Centre for')
+]
+
+# Generic department names that are not an institution on their own
+GENERIC_INSTITUTION_TERMS = frozenset([
+    'department of medicine', 'school of medicine', 'institute of pathology',
+    'division of oncology', 'department of oncology', 'medical oncology',
+    'clinical oncology', 'radiation oncology', 'medicine', 'oncology',
+    'pathology', 'surgery', 'radiology', 'pharmacy'
+])
+
+# Affiliation strings repeat heavily across abstracts, so each distinct one is normalized once
+@lru_cache(maxsize=8192)
+def normalize_institution(affiliation):
+    """Extract the main institution from a complex affiliation (None for empty/invalid)."""
+    if pd.isna(affiliation) or affiliation == '' or str(affiliation).strip() == '':
+        return None  # Return None for empty/invalid so we can filter out
+
+    # Remove department/division prefixes
+    aff = str(affiliation)
+    for prefix_pattern in INSTITUTION_PREFIX_PATTERNS:
+        aff = prefix_pattern.sub('', aff)
+
+    # Extract main institution (first part before comma)
+    parts = aff.split(',')
+    if len(parts) > 0:
+        institution = parts[0].strip()
+
+        # Check if institution is too short (likely just a city) or generic
+        if len(institution) < 10 or institution.lower() in GENERIC_INSTITUTION_TERMS:
+            # Try second part if available (might be the actual institution name)
+            if len(parts) > 1:
+                institution = parts[1].strip()
+                # Still filter out if too short
+                if len(institution) < 10:
                     return None
+            else:
+                return None
 
-            if institution:  # Only return if non-empty
-                return institution
-        return None
-
-    df['normalized_institution'] = df['Affiliation'].apply(normalize_institution)
-
-    # Filter out None/empty institutions before grouping
-    df_with_institutions = df[df['normalized_institution'].notna()]
+        if institution:  # Only return if non-empty
+            return institution
+    return None
+
+@lru_cache(maxsize=8192)
+def get_canonical_name(institution):
+    """Map similar institution names to canonical form (fuzzy merge)."""
+    inst_lower = institution.lower()
+
+    # IRCCS variants
+    if 'irccs' in inst_lower and ('san raffaele' in inst_lower or 'raffaele' in inst_lower):
+        return 'IRCCS San Raffaele Hospital'
+    if 'fondazione irccs' in inst_lower or 'irccs istituto' in inst_lower:
+        # Generic IRCCS - use original name
+        return institution
 
-    if df_with_institutions.empty:
-        return pd.DataFrame()
+    # Dana-Farber variants (with or without partners)
+    if 'dana-farber' in inst_lower or 'dana farber' in inst_lower:
+        return 'Dana-Farber Cancer Institute'
 
-    # Fuzzy merge similar institution names
-    def get_canonical_name(institution):
-        """Map similar institution names to canonical form."""
-        inst_lower = institution.lower()
+    # MD Anderson variants
+    if 'md anderson' in inst_lower or 'anderson cancer' in inst_lower:
+        return 'MD Anderson Cancer Center'
 
-        # IRCCS variants
-        if 'irccs' in inst_lower and ('san raffaele' in inst_lower or 'raffaele' in inst_lower):
-            return 'IRCCS San Raffaele Hospital'
-        if 'fondazione irccs' in inst_lower or 'irccs istituto' in inst_lower:
-            # Generic IRCCS - use original name
-            return institution
+    # Memorial Sloan Kettering variants
+    if 'sloan kettering' in inst_lower or 'mskcc' in inst_lower or 'memorial sloan' in inst_lower:
+        return 'Memorial Sloan Kettering Cancer Center'
 
-        # Dana-Farber variants (with or without partners)
-        if 'dana-farber' in inst_lower or 'dana farber' in inst_lower:
-            return 'Dana-Farber Cancer Institute'
+    # Johns Hopkins variants
+    if 'johns hopkins' in inst_lower:
+        return 'Johns Hopkins University'
 
-        # MD Anderson variants
-        if 'md anderson' in inst_lower or 'anderson cancer' in inst_lower:
-            return 'MD Anderson Cancer Center'
+    # Cleveland Clinic variants
+    if 'cleveland clinic' in inst_lower:
+        return 'Cleveland Clinic'
 
-        # Memorial Sloan Kettering variants
-        if 'sloan kettering' in inst_lower or 'mskcc' in inst_lower or 'memorial sloan' in inst_lower:
-            return 'Memorial Sloan Kettering Cancer Center'
+    # Mayo Clinic variants
+    if 'mayo clinic' in inst_lower:
+        return 'Mayo Clinic'
 
-        # Johns Hopkins variants
-        if 'johns hopkins' in inst_lower:
-            return 'Johns Hopkins University'
+    # Default: return original
+    return institution
 
-        # Cleveland Clinic variants
-        if 'cleveland clinic' in inst_lower:
-            return 'Cleveland Clinic'
+def generate_top_institutions_table(df: pd.DataFrame, n: int = 15) -> pd.DataFrame:
+    """Generate top N institutions by unique abstracts."""
+    if df.empty:
+        return pd.DataFrame()
 
-        # Mayo Clinic variants
-        if 'mayo clinic' in inst_lower:
-            return 'Mayo Clinic'
+    # Normalized names are kept alongside (not added to the caller's frame)
+    normalized_institution = df['Affiliation'].map(normalize_institution)
 
-        # Default: return original
-        return institution
+    # Filter out None/empty institutions before grouping
+    has_institution = normalized_institution.notna()
+    if not has_institution.any():
+        return pd.DataFrame()
 
-    df_with_institutions['canonical_institution'] = df_with_institutions['normalized_institution'].apply(get_canonical_name)
+    df_with_institutions = df.loc[has_institution, ['Identifier', 'Speaker Location']].assign(
+        canonical_institution=normalized_institution[has_institution].map(get_canonical_name)
+    )
 
     # Count unique studies per canonical institution
     inst_counts = df_with_institutions.groupby('canonical_institution').agg({
@@ -1848,71 +1805,73 @@ def generate_top_institutions_table(df: pd.DataFrame, n: int = 15) -> pd.DataFra
     }).reset_index()
 
     inst_counts.columns = ['Institution', '# Studies', 'Locations']
-    inst_counts = inst_counts.sort_values('# Studies', ascending=False).head(n)
+    inst_counts = inst_counts.nlargest(n, '# Studies')
 
     return inst_counts
 
+# Comprehensive biomarker and MOA keywords (biological mechanisms only, no treatment terms)
+BIOMARKERS_MOAS = [
+    # Checkpoint inhibitors & IO targets
+    "PD-1", "PD-L1", "CTLA-4", "LAG-3", "TIM-3", "TIGIT", "ICOS",
+    # ADC targets
+    "Nectin-4", "TROP-2", "HER2", "HER3", "CEACAM5", "FOLR1", "Claudin 18.2",
+    # FGFR pathway
+    "FGFR3", "FGFR2", "FGFR1", "FGFR4", "FGFR",
+    # Tyrosine kinases
+    "EGFR", "ALK", "ROS1", "MET", "KRAS", "BRAF", "RET", "NTRK",
+    # Mismatch repair / microsatellite
+    "MSI-H", "dMMR", "MSI",
+    # Tumor mutational burden
+    "TMB-high", "TMB",
+    # Circulating biomarkers
+    "ctDNA", "CTC",
+    # DNA damage response
+    "PARP", "ATR", "ATM", "BRCA1", "BRCA2", "BRCA", "HRD", "DDR",
+    # Angiogenesis
+    "VEGF", "VEGFR", "VEGFR2",
+    # PI3K/AKT/mTOR pathway
+    "PI3K", "AKT", "mTOR", "PIK3CA",
+    # Cell cycle
+    "CDK4/6", "CDK4", "CDK6",
+    # WNT/beta-catenin
+    "WNT", "beta-catenin",
+    # Epigenetic
+    "EZH2", "IDH1", "IDH2",
+    # Heme targets
+    "CD38", "BCMA", "CD20", "CD19",
+    # Emerging targets
+    "DLL3", "CLDN18.2", "B7-H3", "NaPi2b",
+    # Resistance biomarkers
+    "NRG1", "ERBB2", "ERBB3"
+]
+
+def compile_biomarker_pattern(keyword: str) -> re.Pattern:
+    """Short uppercase acronyms: case-sensitive with word boundaries; longer terms: case-insensitive regex."""
+    if len(keyword) <= 6 and keyword.isupper():
+        return re.compile(r'\b' + re.escape(keyword) + r'\b')
+    return re.compile(keyword, re.IGNORECASE)
+
+# Compiled once at import instead of per keyword per call
+BIOMARKER_MOA_PATTERNS = [(keyword, compile_biomarker_pattern(keyword)) for keyword in BIOMARKERS_MOAS]
+
 def generate_biomarker_moa_table(df: pd.DataFrame) -> pd.DataFrame:
     """Generate comprehensive biomarker/MOA hits table."""
     if df.empty:
         return pd.DataFrame()
 
-    # Comprehensive biomarker and MOA keywords (biological mechanisms only, no treatment terms)
-    biomarkers_moas = [
-        # Checkpoint inhibitors & IO targets
-        "PD-1", "PD-L1", "CTLA-4", "LAG-3", "TIM-3", "TIGIT", "ICOS",
-        # ADC targets
-        "Nectin-4", "TROP-2", "HER2", "HER3", "CEACAM5", "FOLR1", "Claudin 18.2",
-        # FGFR pathway
-        "FGFR3", "FGFR2", "FGFR1", "FGFR4", "FGFR",
-        # Tyrosine kinases
-        "EGFR", "ALK", "ROS1", "MET", "KRAS", "BRAF", "RET", "NTRK",
-        # Mismatch repair / microsatellite
-        "MSI-H", "dMMR", "MSI",
-        # Tumor mutational burden
-        "TMB-high", "TMB",
-        # Circulating biomarkers
-        "ctDNA", "CTC",
-        # DNA damage response
-        "PARP", "ATR", "ATM", "BRCA1", "BRCA2", "BRCA", "HRD", "DDR",
-        # Angiogenesis
-        "VEGF", "VEGFR", "VEGFR2",
-        # PI3K/AKT/mTOR pathway
-        "PI3K", "AKT", "mTOR", "PIK3CA",
-        # Cell cycle
-        "CDK4/6", "CDK4", "CDK6",
-        # WNT/beta-catenin
-        "WNT", "beta-catenin",
-        # Epigenetic
-        "EZH2", "IDH1", "IDH2",
-        # Heme targets
-        "CD38", "BCMA", "CD20", "CD19",
-        # Emerging targets
-        "DLL3", "CLDN18.2", "B7-H3", "NaPi2b",
-        # Resistance biomarkers
-        "NRG1", "ERBB2", "ERBB3"
-    ]
-
     results = []
-    for keyword in biomarkers_moas:
-        # Use word boundaries for short acronyms to prevent false matches
-        if len(keyword) <= 6 and keyword.isupper():
-            # Case-sensitive search with word boundaries for acronyms
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            mask = df['Title'].str.contains(pattern, case=True, na=False, regex=True)
-        else:
-            # Case-insensitive for longer terms
-            mask = df['Title'].str.contains(keyword, case=False, na=False)
+    for keyword, pattern in BIOMARKER_MOA_PATTERNS:
+        mask = df['Title'].str.contains(pattern, na=False)
+        n_matches = mask.sum()
 
-        if mask.sum() > 0:
-            # Get matching studies
-            matching_studies = df[mask]
+        if n_matches > 0:
+            # Get matching studies (only the two columns summarized below)
+            matching_studies = df.loc[mask, ['Identifier', 'Session']]
 
-            # Collect identifiers (handle NaN/empty values)
-            identifiers = matching_studies['Identifier'].fillna('n/a').tolist()
-            identifier_str = ', '.join([str(x) if x != 'n/a' else 'n/a' for x in identifiers[:10]])  # Limit to first 10
-            if len(identifiers) > 10:
-                identifier_str += f', +{len(identifiers) - 10} more'
+            # Collect identifiers (handle NaN/empty values) - only the first 10 are shown
+            identifier_str = ', '.join(str(x) for x in matching_studies['Identifier'].head(10).fillna('n/a'))
+            if n_matches > 10:
+                identifier_str += f', +{n_matches - 10} more'
 
             # Collect unique sessions
             sessions = matching_studies['Session'].fillna('n/a').unique().tolist()
@@ -1922,7 +1881,7 @@ def generate_biomarker_moa_table(df: pd.DataFrame) -> pd.DataFrame:
 
             results.append({
                 'Biomarker/MOA': keyword,
-                '# Studies': mask.sum(),
+                '# Studies': n_matches,
                 'Identifiers': identifier_str,
                 'Sessions': session_str
             })
@@ -1933,94 +1892,122 @@ def generate_biomarker_moa_table(df: pd.DataFrame) -> pd.DataFrame:
 
     return result_df
 
-def generate_competitor_table(df: pd.DataFrame, indication_keywords: list = None, focus_moa_classes: list = None, n: int = 200) -> pd.DataFrame:
-    """
-    Generate competitor drugs table using CSV with MOA/target data.
+# EMD portfolio drugs (lowercase generic/commercial names) to exclude from competitor lists
+EMD_PORTFOLIO_DRUGS = frozenset(['avelumab', 'bavencio', 'tepotinib', 'cetuximab', 'erbitux', 'pimicotinib'])
 
-    Args:
-        df: Dataframe to search
-        indication_keywords: Keywords to filter by indication (e.g., ["bladder", "urothelial"])
-        focus_moa_classes: MOA classes to focus on (e.g., ["ICI", "ADC", "Targeted Therapy"])
-        n: Max results
+def match_competitor_drugs(df: pd.DataFrame, indication_keywords: list = None, log_tag: str = "COMPETITOR") -> Optional[List[Dict[str, Any]]]:
     """
-    if df.empty:
-        return pd.DataFrame()
+    Find non-EMD drugs from Drug_Company_names.csv mentioned in study titles.
 
+    Returns one entry per drug with at least one (indication-filtered) hit: stripped drug
+    fields plus the boolean title mask, in database order. None if the database can't be loaded.
+    Shared by the competitor and emerging threats tables so each drug is scanned once.
+    """
     # Load drug database with MOA data
     try:
-        drug_db_path = Path(__file__).parent / "Drug_Company_names.csv"
-        drug_db = pd.read_csv(drug_db_path, encoding='utf-8-sig')
-        print(f"[COMPETITOR] Loaded drug database with {len(drug_db)} drugs")
+        drug_db = load_drug_database()
+        print(f"[{log_tag}] Loaded drug database with {len(drug_db)} drugs")
     except Exception as e:
-        print(f"[COMPETITOR] ERROR: Could not load Drug_Company_names.csv: {e}")
-        return pd.DataFrame()
+        print(f"[{log_tag}] ERROR: Could not load Drug_Company_names.csv: {e}")
+        return None
 
-    # EMD portfolio drugs to exclude from competitor list
-    emd_drugs = ['avelumab', 'bavencio', 'tepotinib', 'cetuximab', 'erbitux', 'pimicotinib']
+    # Indication mask is the same for every drug - build it once
+    indication_mask = None
+    if indication_keywords:
+        indication_mask = df['Title'].str.contains(compile_terms(indication_keywords), na=False)
 
-    results = []
-    for _, drug_row in drug_db.iterrows():
-        commercial = str(drug_row['drug_commercial']).strip() if pd.notna(drug_row['drug_commercial']) else ""
-        generic = str(drug_row['drug_generic']).strip() if pd.notna(drug_row['drug_generic']) else ""
-        company = str(drug_row['company']).strip() if pd.notna(drug_row['company']) else ""
-        moa_class = str(drug_row['moa_class']).strip() if pd.notna(drug_row['moa_class']) else ""
-        moa_target = str(drug_row['moa_target']).strip() if pd.notna(drug_row['moa_target']) else ""
+    # Case-fold titles once (as str.contains(case=False, regex=False) would per call) and
+    # match upper-cased drug names against them
+    titles_upper = df['Title'].str.upper()
+
+    matches = []
+    for drug_row in drug_db.itertuples(index=False):
+        commercial = drug_row.drug_commercial.strip()
+        generic = drug_row.drug_generic.strip()
 
         # Skip if no valid drug names
         if not commercial and not generic:
             continue
 
         # Skip EMD portfolio drugs
-        if generic.lower() in emd_drugs or commercial.lower() in emd_drugs:
-            continue
-
-        # Filter by MOA class if specified
-        if focus_moa_classes and moa_class and moa_class not in focus_moa_classes:
+        if generic.lower() in EMD_PORTFOLIO_DRUGS or commercial.lower() in EMD_PORTFOLIO_DRUGS:
             continue
 
         # Build search mask for this drug
-        mask = pd.Series([False] * len(df), index=df.index)
+        mask = pd.Series(False, index=df.index)
 
         if commercial:
-            mask = mask | df['Title'].str.contains(commercial, case=False, na=False, regex=False)
+            mask = mask | titles_upper.str.contains(commercial.upper(), na=False, regex=False)
         if generic:
             # For generic names, also search for base name (e.g., "enfortumab vedotin" from "enfortumab vedotin-ejfv")
-            mask = mask | df['Title'].str.contains(generic, case=False, na=False, regex=False)
+            mask = mask | titles_upper.str.contains(generic.upper(), na=False, regex=False)
 
             # Also try base name without suffix (split on hyphen and take first part if multi-word)
             base_generic = generic.split('-')[0].strip() if '-' in generic else generic
             if base_generic != generic and len(base_generic.split()) > 1:  # Only if it's a multi-word drug name
-                mask = mask | df['Title'].str.contains(base_generic, case=False, na=False, regex=False)
+                mask = mask | titles_upper.str.contains(base_generic.upper(), na=False, regex=False)
 
         # Filter by indication keywords if specified
-        if indication_keywords and mask.any():
-            indication_mask = pd.Series([False] * len(df), index=df.index)
-            for keyword in indication_keywords:
-                indication_mask = indication_mask | df['Title'].str.contains(keyword, case=False, na=False, regex=False)
+        if indication_mask is not None:
             mask = mask & indication_mask
 
-        matching_abstracts = df[mask]
-
-        if len(matching_abstracts) == 0:
+        if not mask.any():
             continue
 
-        drug_display_name = generic if generic else commercial
+        matches.append({
+            'commercial': commercial,
+            'generic': generic,
+            'company': drug_row.company.strip(),
+            'moa_class': drug_row.moa_class.strip(),
+            'moa_target': drug_row.moa_target.strip(),
+            'mask': mask
+        })
 
-        for _, row in matching_abstracts.iterrows():
-            results.append({
-                'Drug': drug_display_name,
-                'Company': company,
-                'MOA Class': moa_class,
-                'MOA Target': moa_target,
-                'Identifier': row['Identifier'],
-                'Title': row['Title'][:80] + '...' if len(row['Title']) > 80 else row['Title']
-            })
+    return matches
+
+def generate_competitor_table(df: pd.DataFrame, indication_keywords: list = None, focus_moa_classes: list = None, n: int = 200,
+                              drug_matches: Optional[List[Dict[str, Any]]] = None) -> pd.DataFrame:
+    """
+    Generate competitor drugs table using CSV with MOA/target data.
+
+    Args:
+        df: Dataframe to search
+        indication_keywords: Keywords to filter by indication (e.g., ["bladder", "urothelial"])
+        focus_moa_classes: MOA classes to focus on (e.g., ["ICI", "ADC", "Targeted Therapy"])
+        n: Max results
+        drug_matches: Precomputed match_competitor_drugs(df, indication_keywords) output, if available
+    """
+    if df.empty:
+        return pd.DataFrame()
+
+    if drug_matches is None:
+        drug_matches = match_competitor_drugs(df, indication_keywords)
+        if drug_matches is None:
+            return pd.DataFrame()
+
+    # One block of rows per drug: drug fields broadcast over its matching abstracts
+    results = []
+    for match in drug_matches:
+        moa_class = match['moa_class']
+
+        # Filter by MOA class if specified
+        if focus_moa_classes and moa_class and moa_class not in focus_moa_classes:
+            continue
+
+        matching_abstracts = df.loc[match['mask'], ['Identifier', 'Title']]
+        results.append(matching_abstracts.assign(
+            Drug=match['generic'] if match['generic'] else match['commercial'],
+            Company=match['company'],
+            **{'MOA Class': moa_class, 'MOA Target': match['moa_target']}
+        ))
 
     if not results:
         print(f"[COMPETITOR] No competitor drugs found")
         return pd.DataFrame()
 
-    result_df = pd.DataFrame(results)
+    result_df = pd.concat(results, ignore_index=True)[['Drug', 'Company', 'MOA Class', 'MOA Target', 'Identifier', 'Title']]
+    titles = result_df['Title']
+    result_df['Title'] = titles.where(titles.str.len() <= 80, titles.str[:80] + '...')
 
     # Add study count per drug for sorting (internal use)
     study_counts = result_df.groupby('Drug').size().to_dict()
@@ -2054,12 +2041,13 @@ def generate_drug_moa_ranking(competitor_df: pd.DataFrame, n: int = 20) -> pd.Da
     }).reset_index()
 
     ranking.columns = ['Drug', 'Company', 'MOA Class', '# Studies']
-    ranking = ranking.sort_values('# Studies', ascending=False).head(n)
+    ranking = ranking.nlargest(n, '# Studies')
 
     print(f"[DRUG RANKING] Generated ranking with {len(ranking)} drugs")
     return ranking
 
-def generate_emerging_threats_table(df: pd.DataFrame, indication_keywords: list, n: int = 20) -> pd.DataFrame:
+def generate_emerging_threats_table(df: pd.DataFrame, indication_keywords: list, n: int = 20,
+                                    drug_matches: Optional[List[Dict[str, Any]]] = None) -> pd.DataFrame:
     """
     Identify emerging threats: drugs with 3-5 abstracts showing novel MOAs or combinations.
 
@@ -2067,57 +2055,26 @@ def generate_emerging_threats_table(df: pd.DataFrame, indication_keywords: list,
         df: Dataframe to search
         indication_keywords: Keywords to filter by indication (e.g., ["bladder", "urothelial"])
         n: Max results to return
+        drug_matches: Precomputed match_competitor_drugs(df, indication_keywords) output, if available
     """
     if df.empty:
         return pd.DataFrame()
 
-    try:
-        drug_db_path = Path(__file__).parent / "Drug_Company_names.csv"
-        drug_db = pd.read_csv(drug_db_path, encoding='utf-8-sig')
-        print(f"[EMERGING] Loaded drug database with {len(drug_db)} drugs")
-    except Exception as e:
-        print(f"[EMERGING] ERROR: Could not load Drug_Company_names.csv: {e}")
-        return pd.DataFrame()
-
-    # EMD portfolio to exclude
-    emd_drugs = ['avelumab', 'bavencio', 'tepotinib', 'cetuximab', 'erbitux', 'pimicotinib']
+    if drug_matches is None:
+        drug_matches = match_competitor_drugs(df, indication_keywords, log_tag="EMERGING")
+        if drug_matches is None:
+            return pd.DataFrame()
 
     # Find drugs with 3-5 mentions (emerging, not established)
     emerging = []
-    for _, drug_row in drug_db.iterrows():
-        commercial = str(drug_row['drug_commercial']).strip() if pd.notna(drug_row['drug_commercial']) else ""
-        generic = str(drug_row['drug_generic']).strip() if pd.notna(drug_row['drug_generic']) else ""
-        company = str(drug_row['company']).strip() if pd.notna(drug_row['company']) else ""
-        moa_class = str(drug_row['moa_class']).strip() if pd.notna(drug_row['moa_class']) else "Unknown"
-        moa_target = str(drug_row['moa_target']).strip() if pd.notna(drug_row['moa_target']) else "Unknown"
-
-        if not commercial and not generic:
-            continue
-
-        # Skip EMD portfolio drugs
-        if generic.lower() in emd_drugs or commercial.lower() in emd_drugs:
-            continue
-
-        # Build search mask
-        mask = pd.Series([False] * len(df), index=df.index)
-        if commercial:
-            mask = mask | df['Title'].str.contains(commercial, case=False, na=False, regex=False)
-        if generic:
-            mask = mask | df['Title'].str.contains(generic, case=False, na=False, regex=False)
-
-            # Also try base name without suffix (e.g., "enfortumab vedotin" from "enfortumab vedotin-ejfv")
-            base_generic = generic.split('-')[0].strip() if '-' in generic else generic
-            if base_generic != generic and len(base_generic.split()) > 1:
-                mask = mask | df['Title'].str.contains(base_generic, case=False, na=False, regex=False)
-
-        # Filter by indication keywords
-        if indication_keywords:
-            indication_mask = pd.Series([False] * len(df), index=df.index)
-            for keyword in indication_keywords:
-                indication_mask = indication_mask | df['Title'].str.contains(keyword, case=False, na=False, regex=False)
-            mask = mask & indication_mask
-
-        matching = df[mask]
+    for match in drug_matches:
+        commercial = match['commercial']
+        generic = match['generic']
+        company = match['company']
+        moa_class = match['moa_class'] or "Unknown"
+        moa_target = match['moa_target'] or "Unknown"
+
+        matching = df[match['mask']]
         count = len(matching)
 
         # Emerging: 3-5 mentions (clear signal, not established)
@@ -2135,11 +2092,33 @@ def generate_emerging_threats_table(df: pd.DataFrame, indication_keywords: list,
 
     result_df = pd.DataFrame(emerging)
     if not result_df.empty:
-        result_df = result_df.sort_values('# Studies', ascending=False).head(n)
+        result_df = result_df.nlargest(n, '# Studies')
         print(f"[EMERGING] Found {len(result_df)} emerging threats")
 
     return result_df
 
+@lru_cache(maxsize=8)
+def cached_competitor_tables(focus_drug: Optional[str], csv_hash: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    """Competitor, drug ranking and emerging threats tables for a focus drug (full dataset, cached per version - treat as read-only)."""
+    drug_focus = COMPETITOR_FOCUS.get(focus_drug, {}) if focus_drug else {}
+    indication_keywords = drug_focus.get("indication_keywords", [])
+
+    # Both tables scan the same drugs against the same titles - match once and share
+    drug_matches = match_competitor_drugs(df_global, indication_keywords)
+    if drug_matches is None:
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+
+    competitor_table = generate_competitor_table(
+        df_global,
+        indication_keywords=indication_keywords,
+        focus_moa_classes=drug_focus.get("focus_moa_classes"),
+        n=200,
+        drug_matches=drug_matches
+    )
+    ranking_table = generate_drug_moa_ranking(competitor_table, n=15)
+    emerging_table = generate_emerging_threats_table(df_global, indication_keywords, n=15, drug_matches=drug_matches) if indication_keywords else pd.DataFrame()
+    return competitor_table, ranking_table, emerging_table
+
 # ============================================================================
 # AI STREAMING FUNCTIONS
 # ============================================================================
@@ -2167,7 +2146,7 @@ def stream_openai_tokens(prompt: str, model: str = "gpt-5-mini"):
     """Stream tokens from OpenAI for SSE."""
     if not client:
         print("[OPENAI] ERROR: Client not initialized")
-        yield "data: " + json.dumps({"text": "OpenAI API key not configured."}) + "\n\n"
+        yield sse_event({"text": "OpenAI API key not configured."})
         return
 
     try:
@@ -2185,7 +2164,7 @@ def stream_openai_tokens(prompt: str, model: str = "gpt-5-mini"):
         for event in stream:
             if event.type == "response.output_text.delta":
                 token_count += 1
-                yield "data: " + json.dumps({"text": event.delta}) + "\n\n"
+                yield sse_event({"text": event.delta})
             elif event.type == "response.done":
                 # Check finish reason
                 if hasattr(event, 'response') and hasattr(event.response, 'finish_reason'):
@@ -2198,7 +2177,7 @@ def stream_openai_tokens(prompt: str, model: str = "gpt-5-mini"):
         print(f"[OPENAI] ERROR: {type(e).__name__}: {str(e)}")
         import traceback
         traceback.print_exc()
-        yield "data: " + json.dumps({"error": str(e)}) + "\n\n"
+        yield sse_event({"error": str(e)})
 
 # ============================================================================
 # FLASK ROUTES
@@ -2228,12 +2207,8 @@ def get_data():
     else:
         display_df = filtered_df  # Show all filtered results
 
-    # Convert to records for JSON serialization
-    data_records = display_df[['Title', 'Speakers', 'Affiliation', 'Speaker Location', 'Identifier', 'Room',
-                                 'Session', 'Date', 'Time', 'Theme']].to_dict('records')
-
-    # Sanitize Unicode
-    data_records = sanitize_data_structure(data_records)
+    # Convert to sanitized records for JSON serialization
+    data_records = dataframe_to_records(display_df[EXPLORER_COLUMNS])
 
     # Build filter summary with all filter types
     drugs_summary = ', '.join(drug_filters) if drug_filters else 'All Drugs'
@@ -2267,17 +2242,16 @@ def search_data():
 
     # When searching with no filters, we need to search the FULL dataset, not just first 50
     # So if no filters are active, use the full dataset instead of calling get_filtered_dataframe_multi
+    # (search and highlighting never modify it - highlight_search_results works on its own copy)
     if not drug_filters and not ta_filters and not session_filters and not date_filters:
-        filtered_df = df_global.copy()
+        filtered_df = df_global
     else:
         # Apply multi-filters first
         filtered_df = get_filtered_dataframe_multi(drug_filters, ta_filters, session_filters, date_filters)
 
     if keyword:
         # Apply search to filtered results
-        search_columns = ['Title', 'Speakers', 'Affiliation', 'Speaker Location', 'Identifier', 'Room',
-                         'Session', 'Date', 'Time', 'Theme']
-        search_mask = parse_boolean_query(keyword, filtered_df, search_columns)
+        search_mask = search_dataframe(keyword, filtered_df, EXPLORER_COLUMNS)
         filtered_df = filtered_df[search_mask]
 
         # Highlight search results
@@ -2290,12 +2264,8 @@ def search_data():
     else:
         display_df = filtered_df  # Show all filtered/search results
 
-    # Convert to records
-    data_records = display_df[['Title', 'Speakers', 'Affiliation', 'Speaker Location', 'Identifier', 'Room',
-                                 'Session', 'Date', 'Time', 'Theme']].to_dict('records')
-
-    # Sanitize Unicode
-    data_records = sanitize_data_structure(data_records)
+    # Convert to sanitized records
+    data_records = dataframe_to_records(display_df[EXPLORER_COLUMNS])
 
     # Build filter summary with all filter types
     drugs_summary = ', '.join(drug_filters) if drug_filters else 'All Drugs'
@@ -2334,7 +2304,7 @@ def export_data():
     if keyword:
         search_columns = ['study_title', 'speaker', 'affiliation', 'location', 'identifier',
                          'session_category', 'date', 'time', 'main_filters']
-        search_mask = parse_boolean_query(keyword, filtered_df, search_columns)
+        search_mask = search_dataframe(keyword, filtered_df, search_columns)
         filtered_df = filtered_df[search_mask]
 
     # Create Excel file in memory
@@ -2389,10 +2359,11 @@ def stream_playbook(playbook_key):
     date_filters = request.args.getlist('date_filters[]') or request.args.getlist('date_filters') or []
 
     playbook = PLAYBOOKS[playbook_key]
+    required_tables = playbook.get("required_tables", [])
 
     def generate():
         try:
-            print(f"[PLAYBOOK] Starting {playbook_key} with filters: drugs={drug_filters}, tas={ta_filters}")
+            print(f"[PLAYBOOK] Starting {playbook_key} with filters: drugs={drug_filters}, tas={ta_filters}, tables={required_tables}")
 
             # 1. For COMPETITOR button: Drug filter is for FOCUS, not dataset filtering
             # Apply TA filters only, use drug filter to guide competitor search
@@ -2402,29 +2373,29 @@ def stream_playbook(playbook_key):
                 if ta_filters or session_filters or date_filters:
                     filtered_df = get_filtered_dataframe_multi([], ta_filters, session_filters, date_filters)
                 else:
-                    filtered_df = df_global.copy()
+                    filtered_df = df_global
                 print(f"[PLAYBOOK] Competitor mode: Using dataset with {len(filtered_df)} studies (drug filter used for competitor focus)")
             else:
                 # For other buttons, apply all filters normally
                 if not drug_filters and not ta_filters and not session_filters and not date_filters:
-                    filtered_df = df_global.copy()
+                    filtered_df = df_global
                 else:
                     filtered_df = get_filtered_dataframe_multi(drug_filters, ta_filters, session_filters, date_filters)
                 print(f"[PLAYBOOK] Filtered dataset: {len(filtered_df)} studies")
 
             if filtered_df.empty:
                 print(f"[PLAYBOOK] ERROR: No data after filtering")
-                yield "data: " + json.dumps({"error": "No data matches the selected filters."}) + "\n\n"
+                yield sse_event({"error": "No data matches the selected filters."})
                 return
 
+            n_studies = len(filtered_df)
+
             # 2. Generate table(s) based on playbook requirements
             tables_data = {}
-            print(f"[PLAYBOOK] Required tables: {playbook.get('required_tables', [])}")
 
-            if "top_authors" in playbook.get("required_tables", []):
-                print(f"[PLAYBOOK] Generating top authors table...")
+            if "top_authors" in required_tables:
                 authors_table = generate_top_authors_table(filtered_df, n=15)
-                tables_data["top_authors"] = authors_table.to_markdown(index=False) if not authors_table.empty else "No author data available"
+                tables_data["top_authors"] = dataframe_to_markdown(authors_table) if not authors_table.empty else "No author data available"
 
                 # Send table as SSE event (frontend expects: title, columns, rows as objects)
                 if not authors_table.empty:
@@ -2433,11 +2404,9 @@ def stream_playbook(playbook_key):
                         table_data = {
                             "title": "Top 15 Authors",
                             "columns": list(authors_table.columns),
-                            "rows": sanitize_data_structure(authors_table.to_dict('records'))
+                            "rows": dataframe_to_records(authors_table)
                         }
-                        print(f"[PLAYBOOK] Table data prepared, attempting to send...")
-                        yield "data: " + json.dumps(table_data) + "\n\n"
-                        print(f"[PLAYBOOK] Table sent successfully")
+                        yield sse_event(table_data)
                     except Exception as e:
                         print(f"[PLAYBOOK] ERROR sending table: {type(e).__name__}: {str(e)}")
                         import traceback
@@ -2448,105 +2417,95 @@ def stream_playbook(playbook_key):
                 # For KOL analysis, provide ALL abstracts from each top author (not samples)
                 if playbook_key == "kol" and not authors_table.empty:
                     kol_abstracts = []
-                    for speaker in authors_table['Speaker'].head(15):
-                        speaker_data = filtered_df[filtered_df['Speakers'] == speaker][['Identifier', 'Title', 'Affiliation', 'Session']]
-                        if not speaker_data.empty:
-                            kol_abstracts.append(f"\n**{speaker}** ({len(speaker_data)} abstracts):\n{speaker_data.to_markdown(index=False)}")
+                    top_speakers = authors_table['Speaker'].head(15)
+
+                    # One isin + groupby instead of a full-column comparison per speaker
+                    speaker_mask = filtered_df['Speakers'].isin(top_speakers)
+                    abstracts_by_speaker = dict(tuple(
+                        filtered_df.loc[speaker_mask, ['Identifier', 'Title', 'Affiliation', 'Session']]
+                        .groupby(filtered_df.loc[speaker_mask, 'Speakers'], sort=False)
+                    ))
+
+                    for speaker in top_speakers:
+                        speaker_data = abstracts_by_speaker.get(speaker)
+                        if speaker_data is not None and not speaker_data.empty:
+                            kol_abstracts.append(f"\n**{speaker}** ({len(speaker_data)} abstracts):\n{dataframe_to_markdown(speaker_data)}")
 
                     if kol_abstracts:
                         tables_data["kol_abstracts"] = "\n".join(kol_abstracts)
 
-            if "top_institutions" in playbook.get("required_tables", []):
+            if "top_institutions" in required_tables:
                 inst_table = generate_top_institutions_table(filtered_df, n=15)
-                tables_data["top_institutions"] = inst_table.to_markdown(index=False) if not inst_table.empty else "No institution data available"
+                tables_data["top_institutions"] = dataframe_to_markdown(inst_table) if not inst_table.empty else "No institution data available"
 
                 if not inst_table.empty:
-                    yield "data: " + json.dumps({
+                    yield sse_event({
                         "title": "Top 15 Institutions",
                         "columns": list(inst_table.columns),
-                        "rows": sanitize_data_structure(inst_table.to_dict('records'))
-                    }) + "\n\n"
+                        "rows": dataframe_to_records(inst_table)
+                    })
 
-            if "biomarker_moa_hits" in playbook.get("required_tables", []):
+            if "biomarker_moa_hits" in required_tables:
                 bio_table = generate_biomarker_moa_table(filtered_df)
-                tables_data["biomarker_moa"] = bio_table.to_markdown(index=False) if not bio_table.empty else "No biomarker data available"
+                tables_data["biomarker_moa"] = dataframe_to_markdown(bio_table) if not bio_table.empty else "No biomarker data available"
 
                 if not bio_table.empty:
-                    yield "data: " + json.dumps({
+                    yield sse_event({
                         "title": "Biomarker/MOA Hits",
                         "columns": list(bio_table.columns),
-                        "rows": sanitize_data_structure(bio_table.to_dict('records'))
-                    }) + "\n\n"
+                        "rows": dataframe_to_records(bio_table)
+                    })
 
-            if "all_data" in playbook.get("required_tables", []):
+            if "all_data" in required_tables:
                 # For competitor button, use CSV-driven MOA-aware competitor detection
                 if playbook_key == "competitor":
                     # IMPORTANT: For competitor intelligence, search FULL dataset (not filtered)
                     print(f"[PLAYBOOK] Generating CSV-driven competitor table from FULL dataset ({len(df_global)} studies)")
 
-                    # Define indication keywords and MOA classes based on drug focus
-                    indication_keywords = []
-                    focus_moa_classes = None
-
-                    if drug_filters and drug_filters[0] == "Avelumab Focus":
-                        indication_keywords = ["bladder", "urothelial", "uroepithelial"]
-                        focus_moa_classes = ["ICI", "ADC", "Targeted Therapy", "Bispecific Antibody"]
-                    elif drug_filters and drug_filters[0] == "Tepotinib Focus":
-                        indication_keywords = ["lung", "NSCLC", "MET"]
-                        focus_moa_classes = ["TKI", "ADC", "ICI", "Targeted Therapy"]
-                    elif drug_filters and drug_filters[0] == "Cetuximab CRC":
-                        indication_keywords = ["colorectal", "CRC", "colon", "rectal"]
-                        focus_moa_classes = ["Targeted Therapy", "ICI", "ADC", "Bispecific Antibody"]
-                    elif drug_filters and drug_filters[0] == "Cetuximab H&N":
-                        indication_keywords = ["head and neck", "head & neck", "H&N", "HNSCC", "SCCHN", "oral", "pharyngeal", "laryngeal"]
-                        focus_moa_classes = ["Targeted Therapy", "ICI", "ADC", "Bispecific Antibody"]
-
-                    # Generate competitor table with MOA filtering
-                    competitor_table = generate_competitor_table(
-                        df_global,
-                        indication_keywords=indication_keywords,
-                        focus_moa_classes=focus_moa_classes,
-                        n=200
-                    )
+                    # Indication keywords and MOA classes based on drug focus
+                    focus_drug = drug_filters[0] if drug_filters else None
+                    drug_focus = COMPETITOR_FOCUS.get(focus_drug, {}) if focus_drug else {}
+                    indication_keywords = drug_focus.get("indication_keywords", [])
+
+                    # Competitor, ranking and emerging tables only depend on the focus drug and the
+                    # full dataset, so they are built once per dataset version
+                    competitor_table, ranking_table, emerging_table = cached_competitor_tables(focus_drug, csv_hash_global)
 
                     print(f"[PLAYBOOK] CSV approach found {len(competitor_table)} competitor studies")
-                    tables_data["competitor_abstracts"] = competitor_table.to_markdown(index=False) if not competitor_table.empty else "No competitor drugs found"
+                    tables_data["competitor_abstracts"] = dataframe_to_markdown(competitor_table) if not competitor_table.empty else "No competitor drugs found"
 
                     if not competitor_table.empty:
                         # Table 1: Drug/MOA Ranking Summary
-                        ranking_table = generate_drug_moa_ranking(competitor_table, n=15)
                         if not ranking_table.empty:
                             print(f"[PLAYBOOK] Sending drug ranking table with {len(ranking_table)} drugs")
-                            yield "data: " + json.dumps({
+                            yield sse_event({
                                 "title": f"Competitor Drug Ranking ({len(ranking_table)} drugs)",
                                 "subtitle": "Summary of # studies per drug and MOA class",
                                 "columns": list(ranking_table.columns),
-                                "rows": sanitize_data_structure(ranking_table.to_dict('records'))
-                            }) + "\n\n"
-                            tables_data["drug_ranking"] = ranking_table.to_markdown(index=False)
+                                "rows": dataframe_to_records(ranking_table)
+                            })
+                            tables_data["drug_ranking"] = dataframe_to_markdown(ranking_table)
 
                         # Table 2: Full competitor studies list
                         print(f"[PLAYBOOK] Sending competitor table with {len(competitor_table)} studies")
-                        yield "data: " + json.dumps({
+                        yield sse_event({
                             "title": f"Competitor Studies ({len(competitor_table)} abstracts)",
                             "subtitle": "Filtered by indication keywords and MOA classes from Drug_Company_names.csv",
                             "columns": list(competitor_table.columns),
-                            "rows": sanitize_data_structure(competitor_table.to_dict('records'))
-                        }) + "\n\n"
+                            "rows": dataframe_to_records(competitor_table)
+                        })
 
                     # Table 3: Generate emerging threats table (drugs with 3-5 studies)
                     if indication_keywords:
-                        print(f"[PLAYBOOK] Generating emerging threats table...")
-                        emerging_table = generate_emerging_threats_table(df_global, indication_keywords, n=15)
                         if not emerging_table.empty:
                             print(f"[PLAYBOOK] Found {len(emerging_table)} emerging threats")
-                            tables_data["emerging_threats"] = emerging_table.to_markdown(index=False)
-                            yield "data: " + json.dumps({
+                            tables_data["emerging_threats"] = dataframe_to_markdown(emerging_table)
+                            yield sse_event({
                                 "title": f"Emerging Threats ({len(emerging_table)} drugs with 3-5 studies each)",
                                 "subtitle": "Novel or early-stage drugs showing limited but emerging presence",
                                 "columns": list(emerging_table.columns),
-                                "rows": sanitize_data_structure(emerging_table.to_dict('records'))
-                            }) + "\n\n"
+                                "rows": dataframe_to_records(emerging_table)
+                            })
                         else:
                             print(f"[PLAYBOOK] No emerging threats found")
 
@@ -2555,14 +2514,14 @@ def stream_playbook(playbook_key):
                 else:
                     # For strategy or other buttons, provide sample abstracts
                     sample_df = filtered_df.head(50)[['Identifier', 'Title', 'Speakers', 'Affiliation']]
-                    tables_data["abstracts"] = sample_df.to_markdown(index=False)
+                    tables_data["abstracts"] = dataframe_to_markdown(sample_df)
 
                     if not sample_df.empty:
-                        yield "data: " + json.dumps({
+                        yield sse_event({
                             "title": "Sample Abstracts (First 50)",
                             "columns": list(sample_df.columns),
-                            "rows": sanitize_data_structure(sample_df.to_dict('records'))
-                        }) + "\n\n"
+                            "rows": dataframe_to_records(sample_df)
+                        })
 
             # 3. Build prompt with table data injected
             prompt_template = playbook["ai_prompt"]
@@ -2582,39 +2541,9 @@ def stream_playbook(playbook_key):
             filter_guidance = ""
             if playbook_key == "competitor":
                 if drug_filters:
-                    # Map EMD drug selection to specific competitors to focus on
-                    competitor_focus = {
-                        "Avelumab Focus": {
-                            "indication": "Metastatic Bladder Cancer (1L maintenance)",
-                            "key_competitors": ["enfortumab vedotin (EV)", "EV+pembrolizumab (EV+P)", "pembrolizumab", "nivolumab", "durvalumab", "atezolizumab", "sacituzumab govitecan", "erdafitinib"],
-                            "therapeutic_area": "Bladder/Urothelial Cancer"
-                        },
-                        "Tepotinib Focus": {
-                            "indication": "NSCLC with MET exon 14 skipping mutations",
-                            "key_competitors": ["capmatinib", "crizotinib", "osimertinib", "alectinib", "selpercatinib", "pralsetinib", "pembrolizumab"],
-                            "therapeutic_area": "Non-Small Cell Lung Cancer (NSCLC) - MET alterations"
-                        },
-                        "Cetuximab CRC": {
-                            "indication": "Metastatic Colorectal Cancer (EGFR+, RAS wild-type)",
-                            "key_competitors": ["panitumumab", "bevacizumab", "pembrolizumab", "nivolumab", "regorafenib", "trifluridine/tipiracil", "fruquintinib", "encorafenib+cetuximab"],
-                            "therapeutic_area": "Metastatic Colorectal Cancer"
-                        },
-                        "Cetuximab H&N": {
-                            "indication": "Locally Advanced or Metastatic Head & Neck Cancer (EGFR+)",
-                            "key_competitors": ["pembrolizumab", "nivolumab", "durvalumab", "panitumumab", "toripalimab"],
-                            "therapeutic_area": "Head & Neck Squamous Cell Carcinoma"
-                        }
-                    }
-
                     selected_drug = drug_filters[0] if drug_filters else None
-                    if selected_drug in competitor_focus:
-                        focus = competitor_focus[selected_drug]
-                        competitor_list = "', '".join(focus["key_competitors"])
-                        filter_guidance = f"\n\n**COMPETITIVE ANALYSIS FOCUS**:\n"
-                        filter_guidance += f"- **Primary EMD Asset**: {selected_drug.replace(' Focus', '')} in {focus['indication']}\n"
-                        filter_guidance += f"- **Therapeutic Area**: {focus['therapeutic_area']}\n"
-                        filter_guidance += f"- **Key Competitors to Analyze**: '{competitor_list}'\n"
-                        filter_guidance += f"- **Analysis Scope**: Prioritize these competitors in your analysis. Search the competitor abstracts table for mentions of these drugs and provide detailed competitive positioning insights."
+                    if selected_drug in COMPETITOR_FOCUS_GUIDANCE:
+                        filter_guidance = COMPETITOR_FOCUS_GUIDANCE[selected_drug]
                 elif ta_filters and "All Therapeutic Areas" not in ta_filters:
                     relevant_drugs = []
                     if any(ta in ["Bladder Cancer", "Renal Cancer"] for ta in ta_filters):
@@ -2634,7 +2563,7 @@ def stream_playbook(playbook_key):
 **CONFERENCE DATA CONTEXT**:
 {drug_context}
 {ta_context}
-Total Studies in Filtered Dataset: {len(filtered_df)}{filter_guidance}
+Total Studies in Filtered Dataset: {n_studies}{filter_guidance}
 
 **DATA PROVIDED**:
 {table_context}
@@ -2646,7 +2575,7 @@ Based on the data provided above, write a comprehensive analysis following the f
                 yield token_event
 
         except Exception as e:
-            yield "data: " + json.dumps({"error": f"Streaming error: {str(e)}"}) + "\n\n"
+            yield sse_event({"error": f"Streaming error: {str(e)}"})
 
     return Response(stream_with_heartbeat(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
 
@@ -2671,7 +2600,7 @@ def stream_chat_api():
     date_filters = request.json.get('date_filters', [])
 
     if not user_query:
-        return "data: " + json.dumps({"error": "No message provided"}) + "\n\n", 400
+        return sse_event({"error": "No message provided"}), 400
 
     def generate():
         try:
@@ -2688,7 +2617,7 @@ def stream_chat_api():
                     "• Top rankings (e.g., 'Most active institutions')\n" +
                     "• Trends or analyses (e.g., 'Latest immunotherapy trends')")
 
-                yield "data: " + json.dumps({"text": clarification_text}) + "\n\n"
+                yield sse_event({"text": clarification_text})
                 yield "data: [DONE]\n\n"
                 return
 
@@ -2696,20 +2625,23 @@ def stream_chat_api():
             filtered_df = get_filtered_dataframe_multi(drug_filters, ta_filters, session_filters, date_filters)
 
             if filtered_df.empty:
-                yield "data: " + json.dumps({"text": "No data matches your current filters. Please adjust filters and try again."}) + "\n\n"
+                yield sse_event({"text": "No data matches your current filters. Please adjust filters and try again."})
                 yield "data: [DONE]\n\n"
                 return
 
+            n_studies = len(filtered_df)
+
             # 3. Generate entity table if needed
             table_html = ""
             table_data = pd.DataFrame()
 
-            if classification.get('generate_table'):
+            generate_table = classification.get('generate_table')
+            if generate_table:
                 table_html, table_data = generate_entity_table(classification, df_global)
 
                 if table_html:
                     # Send table first as a separate event
-                    yield "data: " + json.dumps({"table": sanitize_unicode_for_windows(table_html)}) + "\n\n"
+                    yield sse_event({"table": sanitize_unicode_for_windows(table_html)})
 
             # 4. Determine data context for AI response
             if not table_data.empty:
@@ -2719,45 +2651,15 @@ def stream_chat_api():
             elif table_html and table_data.empty:
                 # Table was generated but returned no results (drug/author not found)
                 # Still do semantic search to provide context for AI response
-                relevant_data = filtered_df.head(20)
-
-                if collection:
-                    try:
-                        results = collection.query(
-                            query_texts=[user_query],
-                            n_results=min(20, len(filtered_df))
-                        )
-
-                        if results and results['ids']:
-                            result_indices = [int(doc_id.replace('doc_', '')) for doc_id in results['ids'][0]]
-                            relevant_data = df_global.iloc[result_indices]
-                            relevant_data = relevant_data[relevant_data.index.isin(filtered_df.index)]
-                    except Exception as e:
-                        print(f"[SEMANTIC SEARCH] Error: {e}")
-
+                relevant_data = semantic_search(user_query, filtered_df)
                 data_source = f"semantic search (no exact matches, using related studies)"
             else:
                 # Fall back to semantic search
-                relevant_data = filtered_df.head(20)
-
-                if collection:
-                    try:
-                        results = collection.query(
-                            query_texts=[user_query],
-                            n_results=min(20, len(filtered_df))
-                        )
-
-                        if results and results['ids']:
-                            result_indices = [int(doc_id.replace('doc_', '')) for doc_id in results['ids'][0]]
-                            relevant_data = df_global.iloc[result_indices]
-                            relevant_data = relevant_data[relevant_data.index.isin(filtered_df.index)]
-                    except Exception as e:
-                        print(f"[SEMANTIC SEARCH] Error: {e}")
-
+                relevant_data = semantic_search(user_query, filtered_df)
                 data_source = f"semantic search ({len(relevant_data)} records)"
 
             # 5. Build context from relevant data
-            data_context = relevant_data[['Identifier', 'Title', 'Speakers', 'Affiliation']].head(15).to_markdown(index=False)
+            data_context = dataframe_to_markdown(relevant_data[['Identifier', 'Title', 'Speakers', 'Affiliation']].head(15))
 
             # 6. Build prompt with scope context
             # Build human-readable scope description
@@ -2769,9 +2671,9 @@ def stream_chat_api():
 
             if scope_parts:
                 active_scope = " • ".join(scope_parts)
-                scope_description = f"**ACTIVE SCOPE**: {active_scope} ({len(filtered_df)} studies)"
+                scope_description = f"**ACTIVE SCOPE**: {active_scope} ({n_studies} studies)"
             else:
-                scope_description = f"**ACTIVE SCOPE**: All Conference Data ({len(filtered_df)} studies)"
+                scope_description = f"**ACTIVE SCOPE**: All Conference Data ({n_studies} studies)"
 
             ta_context = f"Therapeutic Area: {', '.join(ta_filters) if ta_filters else 'All Therapeutic Areas'}"
             drug_context = f"Drug Focus: {', '.join(drug_filters) if drug_filters else 'Competitive Landscape'}"
@@ -2785,7 +2687,7 @@ def stream_chat_api():
 
             # Add table context if generated
             table_context = ""
-            if classification.get('generate_table'):
+            if generate_table:
                 if not table_data.empty:
                     table_context = f"\n\n**NOTE**: A data table has been displayed to the user showing {len(table_data)} relevant records. Use this table as your primary source of truth when answering."
                 else:
@@ -2797,7 +2699,7 @@ def stream_chat_api():
 - Respond naturally and conversationally to user queries
 - For greetings like "Hi" or "Hello", be friendly and briefly introduce your capabilities
 - For data questions, provide insights based on the conference abstracts
-- You have access to {len(filtered_df)} conference studies in the current scope
+- You have access to {n_studies} conference studies in the current scope
 
 **USER QUESTION**: {user_query}
 
@@ -2806,12 +2708,12 @@ def stream_chat_api():
 **DATA SOURCE**: {data_source}
 {history_context}{table_context}
 
-**SAMPLE CONFERENCE DATA** (showing {len(relevant_data)} most relevant of {len(filtered_df)} total studies):
+**SAMPLE CONFERENCE DATA** (showing {len(relevant_data)} most relevant of {n_studies} total studies):
 {data_context}
 
 **INSTRUCTIONS**:
 - Respond naturally to the user's question (whether greeting, casual query, or data request)
-- When analyzing conference data, mention the scope size: "Looking at {len(filtered_df)} studies in [scope]..."
+- When analyzing conference data, mention the scope size: "Looking at {n_studies} studies in [scope]..."
 - Always cite Abstract # (Identifier) when referencing specific studies
 - If data doesn't answer the question, acknowledge this and suggest alternatives
 - Consider EMD Serono's portfolio context: avelumab (bladder), tepotinib (NSCLC MET+), cetuximab (CRC/H&N), pimicotinib (TGCT)
@@ -2824,7 +2726,7 @@ Please respond naturally to the user."""
                 yield token_event
 
         except Exception as e:
-            yield "data: " + json.dumps({"error": f"Chat error: {str(e)}"}) + "\n\n"
+            yield sse_event({"error": f"Chat error: {str(e)}"})
             yield "data: [DONE]\n\n"
 
     return Response(stream_with_heartbeat(generate()), mimetype='text/event-stream', headers=SSE_HEADERS)
@@ -0,0 +1,155 @@
+"""
+Data Explorer keyword search: boolean AND/OR/NOT parsing and per-row column matching.
+
+Pure pandas with no app state, so app.py and the tests share it without loading data.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional
+
+import pandas as pd
+
+# Boolean operators between search terms (case-insensitive, captured so they stay in the split)
+BOOLEAN_OPERATOR_SPLIT_RE = re.compile(r'\s+(AND|OR|NOT)\s+', re.IGNORECASE)
+
+def parse_boolean_query(query: str, df: pd.DataFrame, search_columns: list, search_text: Optional[pd.Series] = None) -> pd.Series:
+    """Parse boolean search with AND, OR, NOT operators (search_text: build_search_text(df), if already built)."""
+    # If no boolean operators, use simple search
+    query_upper = query.upper()
+    if not any(op in query_upper for op in ['AND', 'OR', 'NOT']):
+        return execute_simple_search(query, df, search_columns, search_text)
+
+    # Parse the query into tokens and operators
+    # Split by AND, OR while preserving case for search terms
+    terms = []
+    operators = []
+
+    # Split query by boolean operators (case-insensitive)
+    parts = BOOLEAN_OPERATOR_SPLIT_RE.split(query)
+
+    i = 0
+    while i < len(parts):
+        part = parts[i].strip()
+        if not part:
+            i += 1
+            continue
+
+        if part.upper() in ['AND', 'OR', 'NOT']:
+            operators.append(part.upper())
+            i += 1
+        else:
+            terms.append(part)
+            i += 1
+
+    # Build result mask
+    if not terms:
+        return pd.Series(False, index=df.index)
+
+    # Case-fold the searched columns once for all terms (unless the caller already has them)
+    if search_text is None and len(terms) > 1:
+        search_text = build_search_text(df)
+
+    # Start with first term
+    result_mask = execute_simple_search(terms[0], df, search_columns, search_text)
+
+    # Process remaining terms with operators
+    term_idx = 1
+    op_idx = 0
+
+    while term_idx < len(terms) and op_idx < len(operators):
+        operator = operators[op_idx]
+
+        if operator == 'NOT' and term_idx < len(terms):
+            # NOT negates the next term and combines with previous result using AND
+            not_mask = ~execute_simple_search(terms[term_idx], df, search_columns, search_text)
+            result_mask = result_mask & not_mask
+            term_idx += 1
+            op_idx += 1
+        elif operator == 'AND' and term_idx < len(terms):
+            term_mask = execute_simple_search(terms[term_idx], df, search_columns, search_text)
+            result_mask = result_mask & term_mask
+            term_idx += 1
+            op_idx += 1
+        elif operator == 'OR' and term_idx < len(terms):
+            term_mask = execute_simple_search(terms[term_idx], df, search_columns, search_text)
+            result_mask = result_mask | term_mask
+            term_idx += 1
+            op_idx += 1
+        else:
+            op_idx += 1
+
+    return result_mask
+
+@lru_cache(maxsize=256)
+def compile_search_term(term: str, case: bool = False) -> re.Pattern:
+    """Exact-phrase search pattern (escaped, word-bounded), compiled once per term across requests."""
+    return re.compile(r'\b' + re.escape(term) + r'\b', 0 if case else re.IGNORECASE)
+
+# ESMO columns searched by the explorer (using original CSV names)
+SEARCH_COLUMNS = ['Title', 'Speakers', 'Speaker Location', 'Affiliation', 'Identifier', 'Room', 'Date', 'Time', 'Session', 'Theme']
+# Joins the per-row search columns; single-word queries never contain a space, so a match can't straddle two columns
+SEARCH_TEXT_SEPARATOR = ' '
+
+def build_search_text(df: pd.DataFrame) -> Optional[pd.Series]:
+    """Upper-cased search columns joined per row (None if df has none of them)."""
+    columns = [col for col in SEARCH_COLUMNS if col in df.columns]
+    if not columns:
+        return None
+    upper_columns = [df[col].astype(str).str.upper() for col in columns]
+    return upper_columns[0].str.cat(upper_columns[1:], sep=SEARCH_TEXT_SEPARATOR)
+
+def execute_simple_search(keyword: str, df: pd.DataFrame, search_columns: list, search_text: Optional[pd.Series] = None) -> pd.Series:
+    """Execute smart search with quote support for exact matching (search_text: build_search_text(df), if already built)."""
+    # Initialize mask with same index as df to avoid index misalignment
+    mask = pd.Series(False, index=df.index)
+
+    # Check if query is quoted (for exact match)
+    is_quoted = (keyword.startswith('"') and keyword.endswith('"')) or (keyword.startswith("'") and keyword.endswith("'"))
+
+    actual_columns = [col for col in SEARCH_COLUMNS if col in df.columns]
+
+    if is_quoted:
+        # Strip quotes and use exact matching with word boundaries
+        keyword = keyword.strip('"').strip("'")
+        # Use word boundaries for exact match (prevents "ATM" from matching "treatment")
+        # Case-sensitive for quoted searches to match acronyms exactly
+        search_pattern = compile_search_term(keyword, case=True)
+
+        for col in actual_columns:
+            try:
+                col_mask = df[col].astype(str).str.contains(search_pattern, na=False)
+                mask = mask | col_mask
+            except Exception as e:
+                continue
+    else:
+        # No quotes - use standard smart search
+        # Check if multi-word query (contains space)
+        is_multi_word = ' ' in keyword
+
+        if is_multi_word:
+            # Multi-word query: Use exact phrase matching with word boundaries
+            # This prevents "mini oral" from matching "medical oral nutrition"
+            search_pattern = compile_search_term(keyword)
+            for col in actual_columns:
+                try:
+                    col_mask = df[col].astype(str).str.contains(search_pattern, na=False)
+                    mask = mask | col_mask
+                except Exception as e:
+                    continue
+        else:
+            # Single word query: Use partial substring matching
+            # This allows "avel" to match "avelumab"
+            if search_text is not None and SEARCH_TEXT_SEPARATOR not in keyword:
+                # One scan of the pre-upper-cased search text
+                # (same comparison as str.contains(case=False, regex=False) per column)
+                return search_text.str.contains(keyword.upper(), regex=False)
+
+            for col in actual_columns:
+                try:
+                    col_mask = df[col].astype(str).str.contains(keyword, case=False, na=False, regex=False)
+                    mask = mask | col_mask
+                except Exception as e:
+                    continue
+
+    return mask
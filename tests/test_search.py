@@ -0,0 +1,64 @@
+"""Explorer search: the joined search text must match the per-column scan it replaces."""
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import search
+
+CSV_FILE = Path(__file__).parent.parent / "ESMO_2025_FINAL_20250929.csv"
+
+
+@pytest.fixture(scope="module")
+def conference_df():
+    """The conference CSV, with NaN filled in string columns the way app.load_and_process_data does."""
+    df = pd.read_csv(CSV_FILE, encoding='utf-8')
+    for col in df.columns:
+        if df[col].dtype == 'object':
+            df[col] = df[col].fillna('')
+    return df
+
+
+def per_column_mask(keyword: str, df: pd.DataFrame) -> pd.Series:
+    """Reference single-word match: case-insensitive substring in any search column."""
+    mask = pd.Series(False, index=df.index)
+    for col in search.SEARCH_COLUMNS:
+        if col in df.columns:
+            mask = mask | df[col].astype(str).str.contains(keyword, case=False, na=False, regex=False)
+    return mask
+
+
+def test_search_text_keeps_separator_between_columns():
+    df = pd.DataFrame({'Title': ['Lung cancer', 'Breast'], 'Speakers': ['Paul Smith', 'Ann Lee']})
+    search_text = search.build_search_text(df)
+
+    assert search_text.iloc[0] == 'LUNG CANCER' + search.SEARCH_TEXT_SEPARATOR + 'PAUL SMITH'
+    assert search_text.iloc[1] == 'BREAST' + search.SEARCH_TEXT_SEPARATOR + 'ANN LEE'
+
+
+def test_single_word_does_not_match_across_columns():
+    df = pd.DataFrame({'Title': ['Lung cancer', 'Breast'], 'Speakers': ['Paul Smith', 'Ann Lee']})
+    search_text = search.build_search_text(df)
+
+    for keyword in ['cancerp', 'CANCERPAUL', 'breastann', 'cancer', 'lee']:
+        joined = search.execute_simple_search(keyword, df, [], search_text)
+        per_column = search.execute_simple_search(keyword, df, [])
+        pd.testing.assert_series_equal(joined, per_column, check_names=False)
+        pd.testing.assert_series_equal(joined, per_column_mask(keyword, df), check_names=False)
+
+
+@pytest.mark.parametrize('keyword', ['cancerp', 'ospital2', 'nan', 'SS', 'ALL', 'avel'])
+def test_full_dataset_matches_per_column_scan(conference_df, keyword):
+    search_text = search.build_search_text(conference_df)
+
+    mask = search.parse_boolean_query(keyword, conference_df, [], search_text)
+    pd.testing.assert_series_equal(mask, per_column_mask(keyword, conference_df), check_names=False)
+
+
+@pytest.mark.parametrize('query,terms', [('SS OR zzzz', ['SS', 'zzzz']), ('nan OR zzzz', ['nan', 'zzzz'])])
+def test_filtered_subset_boolean_query_matches_per_column_scan(conference_df, query, terms):
+    lung_df = conference_df[conference_df['Title'].str.contains('lung', case=False)]
+    expected = per_column_mask(terms[0], lung_df) | per_column_mask(terms[1], lung_df)
+
+    mask = search.parse_boolean_query(query, lung_df, [])
+    pd.testing.assert_series_equal(mask, expected, check_names=False)